@@ -1,9 +1,12 @@
 from flask import (
     Blueprint, render_template, redirect,
-    url_for, request, current_app, flash
+    url_for, request, current_app, flash, jsonify
 )
 from flask_login import login_required, current_user
 
+from services import exportar, fx, paginacion
+from stats import resumen
+
 admin_bp = Blueprint("admin", __name__)
 
 
@@ -22,7 +25,11 @@ def admin_users():
         return render_template("403.html"), 403
 
     User = current_app.User
-    users = User.query.all()
+    users = paginacion.paginar(
+        User.query,
+        [User.id],
+        total=paginacion.total_aproximado(current_app.db, User),
+    )
     return render_template("admin_users.html", users=users)
 
 
@@ -68,6 +75,17 @@ def admin_delete_user(user_id):
 
     nombre = user.username or user.email
 
+    # Con el usuario se van sus inscripciones y sus cursos quedan sin
+    # profesor (FKs); se hace explícito para mantener los resúmenes
+    Enrollment = current_app.Enrollment
+    Course = current_app.Course
+    inscripciones = Enrollment.query.filter_by(user_id=user.id).all()
+    resumen.registrar_bajas(inscripciones)
+    Enrollment.query.filter_by(user_id=user.id).delete(synchronize_session=False)
+    Course.query.filter_by(teacher_id=user.id).update(
+        {Course.teacher_id: None}, synchronize_session=False
+    )
+
     db.session.delete(user)
     db.session.commit()
 
@@ -89,9 +107,15 @@ def admin_mis_cursos():
     Course = current_app.Course
     cursos = Course.query.filter_by(teacher_id=current_user.id).all()
 
+    moneda = (request.args.get("moneda") or "").strip().upper() or None
+    precios, fx_error = fx.precios_en_moneda(cursos, moneda)
+
     return render_template(
         "cursos.html",
         cursos=cursos,
+        precios=precios,
+        moneda=moneda,
+        fx_error=fx_error,
         panel="admin",
         titulo="Mis cursos",
         active="mis_cursos",
@@ -107,11 +131,22 @@ def admin_todos_cursos():
         return render_template("403.html"), 403
 
     Course = current_app.Course
-    cursos = Course.query.all()
+    cursos = paginacion.paginar(
+        Course.query,
+        [Course.nombre, Course.id],
+        total=paginacion.total_aproximado(current_app.db, Course),
+    )
+
+    moneda = (request.args.get("moneda") or "").strip().upper() or None
+    precios, fx_error = fx.precios_en_moneda(cursos, moneda)
 
     return render_template(
         "cursos.html",
         cursos=cursos,
+        pagina=cursos,
+        precios=precios,
+        moneda=moneda,
+        fx_error=fx_error,
         panel="admin",
         titulo="Todos los cursos",
         active="todos_cursos",
@@ -147,3 +182,35 @@ def admin_ver_inscripciones_curso(course_id):
         active="todos_cursos",
         solo_lectura=True,
     )
+
+
+# ---------- Exportar inscripciones ----------
+
+@admin_bp.route("/admin/curso/<int:course_id>/inscripciones.<any(csv, xlsx):formato>")
+@login_required
+def admin_exportar_inscripciones_curso(course_id, formato):
+    if current_user.role != "admin":
+        return render_template("403.html"), 403
+
+    curso = current_app.Course.query.get_or_404(course_id)
+    return exportar.respuesta(formato, f"inscripciones_{curso.nombre}", course_id)
+
+
+@admin_bp.route("/admin/inscripciones.<any(csv, xlsx):formato>")
+@login_required
+def admin_exportar_inscripciones(formato):
+    if current_user.role != "admin":
+        return render_template("403.html"), 403
+
+    return exportar.respuesta(formato, "inscripciones")
+
+
+# ---------- Monitoreo de proveedores FX ----------
+
+@admin_bp.route("/admin/fx/estado")
+@login_required
+def admin_fx_estado():
+    if current_user.role != "admin":
+        return render_template("403.html"), 403
+
+    return jsonify(proveedores=fx.estado_proveedores())
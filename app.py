@@ -1,10 +1,10 @@
 import os
-import requests
 
 from dotenv import load_dotenv
 
 from flask import Flask, render_template, request, redirect, url_for, flash, send_file, Blueprint
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 from flask_bcrypt import Bcrypt
 from flask_login import (
     LoginManager, UserMixin, login_user, logout_user,
@@ -15,6 +15,9 @@ from auth import auth_bp, oauth
 
 from services.s3 import subir_imagen_curso, url_publica
 
+import migraciones
+
+import time
 from datetime import datetime, timedelta
 
 
@@ -24,10 +27,8 @@ from datetime import datetime, timedelta
 
 load_dotenv()
 
-# --- FX API endpoints ---
-FX_API_BASE = os.getenv('FX_API_BASE', 'https://api.exchangerate.host')
-FX_API_FALLBACK = os.getenv('FX_API_FALLBACK', 'https://open.er-api.com/v6')
-FX_API_ALT = os.getenv('FX_API_ALT', 'https://api.frankfurter.app')
+# --- FX (tasas de cambio con caché; lee FX_* del entorno ya cargado) ---
+from services import fx  # noqa: E402
 
 # --- Flask app ---
 app = Flask(__name__)
@@ -37,6 +38,38 @@ app.config['SECRET_KEY'] = os.getenv('SECRET_KEY') or 'clave_secreta_123'
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL') or 'sqlite:///users.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# --- Motor de BD ---
+# SQLite: pragmas por conexión (ver _configurar_conexion_sqlite).
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS") or 5000)
+SQLITE_CACHE_KIB = int(os.getenv("SQLITE_CACHE_KIB") or 20000)
+SQLITE_MMAP_MB = int(os.getenv("SQLITE_MMAP_MB") or 128)
+# PostgreSQL: pool por worker (gunicorn multiplica por la cantidad de workers).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE") or 5)
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW") or 10)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE") or 1800)
+DB_POOL_PRE_PING = (os.getenv("DB_POOL_PRE_PING") or "1").lower() not in ("0", "false", "no")
+
+
+def _opciones_motor(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS según el motor de la URI."""
+    if uri.startswith("sqlite"):
+        # timeout del driver = espera por el lock antes de "database is locked"
+        return {"connect_args": {"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+# Render/Heroku entregan postgres://, que SQLAlchemy 2 ya no acepta
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith("postgres://"):
+    app.config['SQLALCHEMY_DATABASE_URI'] = app.config['SQLALCHEMY_DATABASE_URI'].replace(
+        "postgres://", "postgresql://", 1
+    )
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = _opciones_motor(app.config['SQLALCHEMY_DATABASE_URI'])
+
 # Configuración de Google OAuth 
 app.config["GOOGLE_CLIENT_ID"] = os.getenv("GOOGLE_CLIENT_ID")
 app.config["GOOGLE_CLIENT_SECRET"] = os.getenv("GOOGLE_CLIENT_SECRET")
@@ -55,6 +88,28 @@ db.init_app(app)
 bcrypt.init_app(app)
 login_manager.init_app(app)
 
+
+def _configurar_conexion_sqlite(dbapi_con, _registro):
+    cur = dbapi_con.cursor()
+    # SQLite no aplica las FKs (ni sus ON DELETE) si no se pide en cada conexión
+    cur.execute("PRAGMA foreign_keys=ON")
+    # WAL: los lectores no bloquean al que escribe (y viceversa); con WAL,
+    # synchronous=NORMAL sigue siendo seguro ante caídas de la app
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cur.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KIB}")
+    cur.execute(f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.close()
+
+
+with app.app_context():
+    if db.engine.dialect.name == "sqlite":
+        event.listen(db.engine, "connect", _configurar_conexion_sqlite)
+
+app.cli.add_command(migraciones.schema_cli)
+
 app.jinja_env.globals["url_publica"] = url_publica
 
 
@@ -70,28 +125,106 @@ class User(UserMixin, db.Model):
 
 
 class Course(db.Model):
+    # Orden estable de los listados paginados (services/paginacion.py);
+    # (teacher_id, nombre, id) también sirve las búsquedas por profesor
+    __table_args__ = (
+        db.Index("ix_course_nombre_id", "nombre", "id"),
+        db.Index("ix_course_teacher_nombre", "teacher_id", "nombre", "id"),
+    )
+
     id          = db.Column(db.Integer, primary_key=True)
     nombre      = db.Column(db.String(120), nullable=False)        
     descripcion = db.Column(db.Text, nullable=True)
     precio      = db.Column(db.Float, nullable=False, default=0.0) 
-    teacher_id  = db.Column(db.Integer, nullable=True)             
+    teacher_id  = db.Column(
+        db.Integer,
+        db.ForeignKey("user.id", ondelete="SET NULL", name="fk_course_teacher"),
+        nullable=True,
+    )
     image_key   = db.Column(db.String(255), nullable=True)
 
 
 class Enrollment(db.Model):
+    # El único (user_id, course_id) también es el índice de las consultas
+    # por alumno; (course_id, created_at, id) el de las consultas por curso
+    # (y el orden por fecha de las calificaciones de un curso).
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "course_id", name="uq_enrollment_user_course"),
+        db.Index("ix_enrollment_course_created", "course_id", "created_at", "id"),
+    )
+
     id        = db.Column(db.Integer, primary_key=True)
-    user_id   = db.Column(db.Integer, nullable=False)
-    course_id = db.Column(db.Integer, nullable=False)
+    user_id   = db.Column(
+        db.Integer,
+        db.ForeignKey("user.id", ondelete="CASCADE", name="fk_enrollment_user"),
+        nullable=False,
+    )
+    course_id = db.Column(
+        db.Integer,
+        db.ForeignKey("course.id", ondelete="CASCADE", name="fk_enrollment_course"),
+        nullable=False,
+    )
     status    = db.Column(db.String(20), nullable=False, default='pendiente')
     
-    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
     
     nota = db.Column(db.Float, nullable=True)
 
+
+class FxSnapshot(db.Model):
+    id          = db.Column(db.Integer, primary_key=True)
+    proveedor   = db.Column(db.String(255), nullable=True)
+    tasas       = db.Column(db.Text, nullable=False)        # JSON {moneda: tasa USD}
+    obtenida_en = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class StatsVersion(db.Model):
+    # Una sola fila (id=1): época de los datos de los gráficos. Solo cambia
+    # al recalcular los resúmenes; las escrituras suben StatsVersionAlcance.
+    id         = db.Column(db.Integer, primary_key=True)
+    version    = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class StatsVersionAlcance(db.Model):
+    # Versión por curso ("curso") y por estudiante ("estudiante"): cada
+    # escritura sube solo las filas que toca (ver stats/resumen.py)
+    alcance    = db.Column(db.String(10), primary_key=True)
+    id         = db.Column(db.Integer, primary_key=True)
+    version    = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+# --- Tablas resumen de estadísticas (se mantienen en stats/resumen.py) ---
+
+class StatsCurso(db.Model):
+    course_id     = db.Column(db.Integer, primary_key=True)
+    inscripciones = db.Column(db.Integer, nullable=False, default=0)
+    suma_notas    = db.Column(db.Float, nullable=False, default=0.0)
+    cant_notas    = db.Column(db.Integer, nullable=False, default=0)
+
+
+class StatsCursoDia(db.Model):
+    course_id = db.Column(db.Integer, primary_key=True)
+    fecha     = db.Column(db.Date, primary_key=True, index=True)  # rangos de fechas
+    cantidad  = db.Column(db.Integer, nullable=False, default=0)
+
+
+class StatsEstudianteEstado(db.Model):
+    user_id  = db.Column(db.Integer, primary_key=True)
+    status   = db.Column(db.String(20), primary_key=True)
+    cantidad = db.Column(db.Integer, nullable=False, default=0)
+
 app.db = db
 app.Course = Course
 app.Enrollment = Enrollment
 app.User = User
+app.FxSnapshot = FxSnapshot
+app.StatsVersion = StatsVersion
+app.StatsVersionAlcance = StatsVersionAlcance
+app.StatsCurso = StatsCurso
+app.StatsCursoDia = StatsCursoDia
+app.StatsEstudianteEstado = StatsEstudianteEstado
 
 # --- Flask-Login: cómo cargar usuario por ID ---
 @login_manager.user_loader
@@ -130,52 +263,8 @@ def login_or_register_google_user(user_info):
 
 
 def convertir_monto_desde_usd(amount: float, to: str):
-
-    providers = [FX_API_BASE, FX_API_FALLBACK, FX_API_ALT]
-
-    for base in providers:
-        try:
-            # 1) exchangerate.host (Admite ARS y tiene endpoint /convert)
-            if 'exchangerate.host' in base:
-                r = requests.get(
-                    f"{base}/convert",
-                    params={"from": "USD", "to": to, "amount": amount},
-                    timeout=6,
-                )
-                if r.ok:
-                    data = r.json()
-                    if data.get("result") is not None:
-                        return float(data["result"]), None
-
-            # 2) open.er-api.com 
-            elif 'open-er-api' in base or 'open.er-api.com' in base:
-                r = requests.get(f"{base}/latest/USD", timeout=6)
-                if r.ok:
-                    data = r.json()
-
-                    if data.get("result") == "success":
-                        rate = data.get("conversion_rates", {}).get(to)
-                        if rate:
-                            return float(amount) * float(rate), None
-
-            # 3) frankfurter.app (estable, pero NO ARS; para EUR/USD)
-            elif 'frankfurter.app' in base:
-                r = requests.get(
-                    f"{base}/latest",
-                    params={"amount": amount, "from": "USD", "to": to},
-                    timeout=6,
-                )
-                if r.ok:
-                    data = r.json()
-                    rate_value = data.get("rates", {}).get(to)
-                    if rate_value is not None:
-                        # Aquí la API devuelve inmediatamente la suma ya multiplicada.
-                        return float(rate_value), None
-        except requests.RequestException:
-            # Probemos con el siguiente proveedor
-            continue
-
-    return None, "Todas las APIs fallaron o no están disponibles ahora."
+    """Convierte desde USD usando la tabla de tasas en caché (services/fx.py)."""
+    return fx.convertir_desde_usd(amount, to)
 
 app.convertir_monto_desde_usd = convertir_monto_desde_usd
 
@@ -211,6 +300,13 @@ def _init_db_and_seed():
     with app.app_context():
         db.create_all()
 
+        # create_all no modifica tablas existentes: restricciones e índices
+        # nuevos van por migraciones.py
+        try:
+            migraciones.aplicar(db, al_arrancar=True)
+        except Exception as e:
+            print("Error aplicando migraciones:", e)
+
         try:
             seed_cursos_si_hace_falta(db, Course)
         except Exception as e:
@@ -226,8 +322,38 @@ def _init_db_and_seed():
         except Exception as e:
             print("Error en seed_stats_demo:", e)
 
+        # Versión inicial de datos para la caché de gráficos. Arranca en el
+        # timestamp actual para no coincidir con PNG de una BD anterior.
+        try:
+            if not db.session.get(StatsVersion, 1):
+                db.session.add(StatsVersion(
+                    id=1, version=int(time.time()), updated_at=datetime.utcnow()
+                ))
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print("Error creando StatsVersion:", e)
+
+        # Tablas resumen: se calculan desde cero si están vacías (BD nueva
+        # o recién sembrada); después se mantienen en cada escritura.
+        try:
+            if StatsCurso.query.first() is None and Enrollment.query.first() is not None:
+                from stats.resumen import reconstruir
+                reconstruir()
+        except Exception as e:
+            db.session.rollback()
+            print("Error reconstruyendo resúmenes de stats:", e)
+
+
+# Los procesos de render de gráficos (stats/render.py, multiprocessing con
+# "spawn") vuelven a importar el script principal como __mp_main__ cuando se
+# arranca con `python app.py`: ahí no hay que tocar la BD ni arrancar el
+# refresco de tasas.
+if __name__ != "__mp_main__":
+    _init_db_and_seed()
 
-_init_db_and_seed()
+    # Tasas de cambio: último snapshot de la BD + refresco en segundo plano
+    fx.init_app(app)
 
 # --- REGISTRO DE BLUEPRINTS ---
 
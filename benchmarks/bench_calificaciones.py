@@ -0,0 +1,92 @@
+# benchmarks/bench_calificaciones.py
+"""
+Libro de calificaciones del profesor (profesor.profesor_calificaciones):
+la consulta original (todas las inscripciones de la BD, sin límite) vs.
+la página de 25 filas del profesor, con los índices que deja la
+migración 003 y con los compuestos de la 004.
+
+Uso:
+    python benchmarks/bench_calificaciones.py [inscripciones]   # por defecto 500_000
+
+Reutiliza la BD de bench_indices.py (20k alumnos, 500 cursos, 50
+profesores). Solo usa sqlite3 de la biblioteca estándar.
+"""
+
+import os
+import sys
+import tempfile
+
+from bench_indices import USUARIOS, crear_bd, medir, plan
+
+
+PROFESOR = USUARIOS + 7
+TAM = 25
+
+SELECT = (
+    "SELECT e.*, c.*, u.* FROM enrollment e "
+    "JOIN course c ON c.id = e.course_id JOIN user u ON u.id = e.user_id "
+)
+
+# Índices de la 003 (sobre los de bench_indices.INDICES) y reemplazos de la 004
+INDICES_003 = "CREATE INDEX ix_course_nombre_id ON course (nombre, id);"
+INDICES_004 = """
+    CREATE INDEX ix_course_teacher_nombre ON course (teacher_id, nombre, id);
+    CREATE INDEX ix_enrollment_course_created ON enrollment (course_id, created_at, id);
+    DROP INDEX ix_course_teacher_id;
+    DROP INDEX ix_enrollment_course_id;
+"""
+
+
+def consultas(curso):
+    """(nombre, SQL, parámetros) con un curso del profesor para los filtros."""
+    return [
+        ("original (toda la BD)",
+         SELECT + "ORDER BY c.nombre, u.username", ()),
+        ("curso y alumno, pág. 1",
+         SELECT + "WHERE c.teacher_id = ? ORDER BY c.nombre, c.id, u.username LIMIT ?",
+         (PROFESOR, TAM + 1)),
+        ("curso y alumno, pág. siguiente",
+         SELECT + "WHERE c.teacher_id = ? AND (c.nombre, c.id, u.username) > (?, ?, ?) "
+         "ORDER BY c.nombre, c.id, u.username LIMIT ?",
+         (PROFESOR, f"Curso {curso}", curso, "u5", TAM + 1)),
+        ("alumno y curso, pág. 1",
+         SELECT + "WHERE c.teacher_id = ? ORDER BY u.username, c.nombre, c.id LIMIT ?",
+         (PROFESOR, TAM + 1)),
+        ("un curso, por alumno",
+         SELECT + "WHERE c.teacher_id = ? AND e.course_id = ? "
+         "ORDER BY c.nombre, c.id, u.username LIMIT ?",
+         (PROFESOR, curso, TAM + 1)),
+        ("un curso, más recientes",
+         SELECT + "WHERE c.teacher_id = ? AND e.course_id = ? "
+         "ORDER BY e.created_at DESC, e.id DESC LIMIT ?",
+         (PROFESOR, curso, TAM + 1)),
+    ]
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Creando BDs con {filas:,} inscripciones...\n")
+        antes = crear_bd(os.path.join(tmp, "antes.db"), filas, con_indices=True)
+        antes.executescript(INDICES_003 + "ANALYZE;")
+        despues = crear_bd(os.path.join(tmp, "despues.db"), filas, con_indices=True)
+        despues.executescript(INDICES_003 + INDICES_004 + "ANALYZE;")
+
+        curso = antes.execute(
+            "SELECT id FROM course WHERE teacher_id = ? ORDER BY id LIMIT 1", (PROFESOR,)
+        ).fetchone()[0]
+
+        for nombre, sql, params in consultas(curso):
+            t_antes, t_despues = medir(antes, sql, params), medir(despues, sql, params)
+            print(nombre)
+            print(f"  003:   {t_antes:9.3f} ms  {plan(antes, sql, params)}")
+            print(f"  004:   {t_despues:9.3f} ms  {plan(despues, sql, params)}")
+            print()
+
+        antes.close()
+        despues.close()
+
+
+if __name__ == "__main__":
+    main()
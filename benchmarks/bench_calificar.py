@@ -0,0 +1,109 @@
+# benchmarks/bench_calificar.py
+"""
+Calificar un curso entero con services.calificaciones.calificar(): una
+llamada por alumno (lo que hacía el formulario de
+gestionar_inscripciones_curso, una fila por POST y un commit cada una) vs.
+una sola llamada con todo el curso (una consulta para validar, un UPDATE
+executemany, el ajuste de los resúmenes y un commit).
+
+Uso:
+    python benchmarks/bench_calificar.py [alumnos]     # por defecto 200
+
+Importa app.py contra una BD SQLite temporal (con sus pragmas, tablas
+resumen y versiones de gráficos), le agrega un curso con `alumnos`
+inscriptos y mide el servicio sin HTTP ni render de la página.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def cargar_app(tmp):
+    """Importa app.py con una BD nueva en `tmp` (crea tablas y siembra los datos demo)."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ["FX_REFRESCO"] = "0"
+    sys.path.insert(0, RAIZ)
+    import app
+    return app
+
+
+def preparar(modulo, alumnos):
+    """Un curso nuevo con `alumnos` estudiantes inscriptos. Devuelve (course_id, enrollment ids)."""
+    db, User, Course, Enrollment = modulo.db, modulo.User, modulo.Course, modulo.Enrollment
+    from stats import resumen
+
+    curso = Course(nombre="Curso bench", precio=0)
+    db.session.add(curso)
+    db.session.flush()
+    db.session.execute(db.insert(User), [
+        {"username": f"bench{i}", "password": "-", "role": "estudiante"}
+        for i in range(alumnos)
+    ])
+    ids = db.session.scalars(
+        db.select(User.id).where(User.username.like("bench%")).order_by(User.id)
+    ).all()
+    ahora = datetime.utcnow()
+    db.session.execute(db.insert(Enrollment), [
+        {"user_id": u, "course_id": curso.id, "status": "pendiente", "created_at": ahora}
+        for u in ids
+    ])
+    db.session.commit()
+    resumen.reconstruir()
+
+    inscripciones = db.session.scalars(
+        db.select(Enrollment.id).where(Enrollment.course_id == curso.id).order_by(Enrollment.id)
+    ).all()
+    return curso.id, inscripciones
+
+
+def entradas(inscripciones, semilla):
+    rnd = random.Random(semilla)
+    return [
+        {"enrollment_id": i, "status": "entregado", "nota": str(round(rnd.uniform(1, 10), 1))}
+        for i in inscripciones
+    ]
+
+
+def de_a_uno(calificar, course_id, cambios):
+    for entrada in cambios:
+        calificar(course_id, [entrada])
+
+
+def en_lote(calificar, course_id, cambios):
+    calificar(course_id, cambios)
+
+
+def main():
+    alumnos = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    with tempfile.TemporaryDirectory() as tmp:
+        modulo = cargar_app(tmp)
+        from services.calificaciones import calificar
+
+        with modulo.app.app_context():
+            course_id, inscripciones = preparar(modulo, alumnos)
+            print(f"\nCalificar {alumnos} inscripciones de un curso con calificar()\n")
+
+            semilla = 0
+            for nombre, fn in (("de a una", de_a_uno), ("en lote", en_lote)):
+                tiempos = []
+                for _ in range(5):
+                    cambios = entradas(inscripciones, semilla)
+                    semilla += 1
+                    inicio = time.perf_counter()
+                    fn(calificar, course_id, cambios)
+                    tiempos.append(time.perf_counter() - inicio)
+                tiempos.sort()
+                transacciones = f"{alumnos} transacciones" if fn is de_a_uno else "1 transacción"
+                print(f"{nombre:<10} {tiempos[len(tiempos) // 2] * 1000:9.2f} ms  ({transacciones})")
+
+
+if __name__ == "__main__":
+    main()
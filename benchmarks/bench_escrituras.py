@@ -0,0 +1,170 @@
+# benchmarks/bench_escrituras.py
+"""
+Escrituras concurrentes en SQLite como las de varios workers de gunicorn:
+configuración por defecto vs. los pragmas de app.py (WAL,
+synchronous=NORMAL, busy_timeout, cache_size, mmap).
+
+Uso:
+    python benchmarks/bench_escrituras.py [escritores] [lectores] [segundos]
+    # por defecto 4 escritores, 4 lectores, 5 segundos
+
+Cada escritor (un proceso) repite la transacción de `inscribirme`:
+INSERT en enrollment + upsert en stats_curso y stats_curso_dia +
+UPDATE de stats_version. Cada lector repite las consultas de los
+gráficos. Solo usa la biblioteca estándar.
+"""
+
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+
+CURSOS = 50
+
+ESQUEMA = """
+    CREATE TABLE course (id INTEGER PRIMARY KEY, nombre TEXT NOT NULL);
+    CREATE TABLE enrollment (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        course_id INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        created_at DATETIME NOT NULL,
+        nota REAL
+    );
+    CREATE INDEX ix_enrollment_course_id ON enrollment (course_id);
+    CREATE TABLE stats_curso (course_id INTEGER PRIMARY KEY, inscripciones INTEGER NOT NULL);
+    CREATE TABLE stats_curso_dia (
+        course_id INTEGER NOT NULL, fecha DATE NOT NULL, cantidad INTEGER NOT NULL,
+        PRIMARY KEY (course_id, fecha)
+    );
+    CREATE TABLE stats_version (id INTEGER PRIMARY KEY, version INTEGER NOT NULL);
+    INSERT INTO stats_version VALUES (1, 1);
+"""
+
+# (nombre, pragmas por conexión, timeout del driver en segundos)
+CONFIGURACIONES = [
+    ("por defecto", [], 5.0),
+    ("app.py", [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA busy_timeout=5000",
+        "PRAGMA cache_size=-20000",
+        f"PRAGMA mmap_size={128 * 1024 * 1024}",
+        "PRAGMA temp_store=MEMORY",
+    ], 5.0),
+]
+
+
+def conectar(path, pragmas, timeout):
+    con = sqlite3.connect(path, timeout=timeout)
+    for p in pragmas:
+        con.execute(p)
+    return con
+
+
+def escritor(path, pragmas, timeout, segundos, semilla, salida):
+    con = conectar(path, pragmas, timeout)
+    rnd = random.Random(semilla)
+    latencias, errores = [], 0
+    fin = time.perf_counter() + segundos
+    while time.perf_counter() < fin:
+        curso = rnd.randint(1, CURSOS)
+        inicio = time.perf_counter()
+        try:
+            with con:
+                con.execute(
+                    "INSERT INTO enrollment (user_id, course_id, status, created_at) "
+                    "VALUES (?, ?, 'pendiente', datetime('now'))",
+                    (rnd.randint(1, 100_000), curso),
+                )
+                con.execute(
+                    "INSERT INTO stats_curso VALUES (?, 1) ON CONFLICT (course_id) "
+                    "DO UPDATE SET inscripciones = inscripciones + 1",
+                    (curso,),
+                )
+                con.execute(
+                    "INSERT INTO stats_curso_dia VALUES (?, date('now'), 1) "
+                    "ON CONFLICT (course_id, fecha) DO UPDATE SET cantidad = cantidad + 1",
+                    (curso,),
+                )
+                con.execute("UPDATE stats_version SET version = version + 1 WHERE id = 1")
+            latencias.append(time.perf_counter() - inicio)
+        except sqlite3.OperationalError:   # database is locked
+            errores += 1
+    salida.put(("escritor", latencias, errores))
+
+
+def lector(path, pragmas, timeout, segundos, salida):
+    con = conectar(path, pragmas, timeout)
+    consultas, errores = 0, 0
+    fin = time.perf_counter() + segundos
+    while time.perf_counter() < fin:
+        try:
+            con.execute("SELECT version FROM stats_version WHERE id = 1").fetchone()
+            con.execute(
+                "SELECT c.nombre, s.inscripciones FROM stats_curso s "
+                "JOIN course c ON c.id = s.course_id ORDER BY c.nombre"
+            ).fetchall()
+            con.execute("SELECT course_id, COUNT(*) FROM enrollment GROUP BY course_id").fetchall()
+            consultas += 1
+        except sqlite3.OperationalError:
+            errores += 1
+    salida.put(("lector", consultas, errores))
+
+
+def correr(nombre, pragmas, timeout, escritores, lectores, segundos):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        con = conectar(path, pragmas, timeout)
+        con.executescript(ESQUEMA)
+        con.executemany("INSERT INTO course VALUES (?, ?)", [(i, f"Curso {i}") for i in range(1, CURSOS + 1)])
+        con.commit()
+        con.close()
+
+        salida = multiprocessing.Queue()
+        procesos = [
+            multiprocessing.Process(target=escritor, args=(path, pragmas, timeout, segundos, i, salida))
+            for i in range(escritores)
+        ] + [
+            multiprocessing.Process(target=lector, args=(path, pragmas, timeout, segundos, salida))
+            for _ in range(lectores)
+        ]
+        for p in procesos:
+            p.start()
+        resultados = [salida.get() for _ in procesos]
+        for p in procesos:
+            p.join()
+
+    latencias = [l for tipo, ls, _ in resultados if tipo == "escritor" for l in ls]
+    err_esc = sum(e for tipo, _, e in resultados if tipo == "escritor")
+    lecturas = sum(n for tipo, n, _ in resultados if tipo == "lector")
+    err_lec = sum(e for tipo, _, e in resultados if tipo == "lector")
+
+    latencias.sort()
+    p50 = statistics.median(latencias) * 1000 if latencias else float("nan")
+    p99 = latencias[int(len(latencias) * 0.99) - 1] * 1000 if latencias else float("nan")
+    print(
+        f"{nombre:<12} {len(latencias) / segundos:9.0f} escrituras/s  "
+        f"p50 {p50:7.2f} ms  p99 {p99:8.2f} ms  "
+        f"{lecturas / segundos:7.0f} lecturas/s  "
+        f"errores 'locked': {err_esc} escritura, {err_lec} lectura"
+    )
+
+
+def main():
+    escritores = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    lectores = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    segundos = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    print(f"{escritores} escritores, {lectores} lectores, {segundos:g} s por configuración\n")
+    for nombre, pragmas, timeout in CONFIGURACIONES:
+        correr(nombre, pragmas, timeout, escritores, lectores, segundos)
+
+
+if __name__ == "__main__":
+    main()
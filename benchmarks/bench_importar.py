@@ -0,0 +1,108 @@
+# benchmarks/bench_importar.py
+"""
+Importar las notas de un CSV a un curso con services.importar.importar():
+fila por fila (un CSV de una fila y un commit por alumno, como cargarlas
+una a una en gestionar_inscripciones_curso) vs. el archivo entero (por
+lotes, en una transacción).
+
+Uso:
+    python benchmarks/bench_importar.py [filas] [lote]     # por defecto 10_000 y 500
+
+Importa app.py contra una BD SQLite temporal (con sus pragmas, tablas
+resumen y versiones de gráficos), le agrega `filas` estudiantes y dos
+cursos con la mitad de ellos inscriptos: cada modo importa el mismo CSV
+generado (mitad altas, mitad cambios) en su curso. Mide el servicio
+entero (lectura del CSV, validación, resúmenes) sin HTTP.
+"""
+
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def cargar_app(tmp):
+    """Importa app.py con una BD nueva en `tmp` (crea tablas y siembra los datos demo)."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ["FX_REFRESCO"] = "0"
+    sys.path.insert(0, RAIZ)
+    import app
+    return app
+
+
+def preparar(modulo, filas, cursos):
+    """`filas` estudiantes y `cursos` cursos nuevos, cada uno con la mitad inscripta."""
+    db, User, Course, Enrollment = modulo.db, modulo.User, modulo.Course, modulo.Enrollment
+    from stats import resumen
+
+    db.session.execute(db.insert(User), [
+        {"username": f"alumno{i}", "password": "-", "role": "estudiante"}
+        for i in range(1, filas + 1)
+    ])
+    ids = db.session.scalars(
+        db.select(User.id).where(User.username.like("alumno%")).order_by(User.id)
+    ).all()
+
+    nuevos = [Course(nombre=f"Curso bench {n}", precio=0) for n in range(cursos)]
+    db.session.add_all(nuevos)
+    db.session.flush()
+    ahora = datetime.utcnow()
+    for curso in nuevos:
+        db.session.execute(db.insert(Enrollment), [
+            {"user_id": u, "course_id": curso.id, "status": "pendiente", "created_at": ahora}
+            for u in ids[::2]
+        ])
+    db.session.commit()
+    resumen.reconstruir()
+    return [c.id for c in nuevos]
+
+
+def archivo(filas):
+    rnd = random.Random(1)
+    return [f"alumno{i},entregado,{round(rnd.uniform(1, 10), 1)}" for i in range(1, filas + 1)]
+
+
+def _csv(lineas):
+    return io.BytesIO(("username,status,nota\n" + "\n".join(lineas) + "\n").encode("utf-8"))
+
+
+def fila_por_fila(importar, course_id, lineas):
+    for linea in lineas:
+        importar(course_id, _csv([linea]))
+
+
+def por_lotes(importar, course_id, lineas):
+    return importar(course_id, _csv(lineas))
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    lote = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    with tempfile.TemporaryDirectory() as tmp:
+        modulo = cargar_app(tmp)
+        from services import importar as servicio
+        servicio.IMPORTAR_LOTE = lote
+
+        with modulo.app.app_context():
+            cursos = preparar(modulo, filas, 2)
+            lineas = archivo(filas)
+            print(f"\nImportar {filas:,} filas a un curso con importar() (mitad altas, mitad cambios)\n")
+
+            modos = (("fila por fila", fila_por_fila), (f"lotes de {lote}", por_lotes))
+            for (nombre, fn), course_id in zip(modos, cursos):
+                inicio = time.perf_counter()
+                fn(servicio.importar, course_id, lineas)
+                total = time.perf_counter() - inicio
+                transacciones = f"{filas:,} transacciones" if fn is fila_por_fila else "1 transacción"
+                print(f"{nombre:<14} {total:8.2f} s  ({transacciones})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/bench_importtime.py
+"""
+Tiempo y memoria de arranque de un worker: `python -X importtime -c "import app"`.
+
+Uso:
+    python benchmarks/bench_importtime.py [--presupuesto-ms 1200] [--corridas 5] [--top 15]
+
+Importa app.py en subprocesos (BD SQLite temporal, sin refresco de
+tasas), toma la corrida mediana, muestra los módulos más costosos y
+falla (código 1) si:
+
+ - el import de app supera el presupuesto (--presupuesto-ms o
+   BENCH_IMPORT_PRESUPUESTO_MS), o
+ - se cargó algún módulo que no debe importarse al arrancar
+   (matplotlib, pandas: se cargan recién al renderizar un gráfico).
+
+La primera corrida crea y siembra la BD temporal (bcrypt de los usuarios
+demo); por eso no se cuenta.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROHIBIDOS = ("matplotlib", "pandas")
+
+PRESUPUESTO_MS = float(os.getenv("BENCH_IMPORT_PRESUPUESTO_MS") or 1200)
+
+# Importa app e imprime el pico de memoria del proceso (KiB en Linux)
+CODIGO = "import app, resource; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+
+
+def importtime(db_path):
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "FX_REFRESCO": "0",
+        "PYTHONDONTWRITEBYTECODE": "1",
+    })
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CODIGO],
+        cwd=RAIZ, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        sys.exit(f"Error importando app:\n{proc.stderr[-2000:]}")
+
+    rss_kib = int(proc.stdout.strip().splitlines()[-1])
+    modulos = []
+    for linea in proc.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, acumulado, nombre = linea.split(":", 1)[1].split("|")
+        modulos.append((nombre.strip(), int(propio), int(acumulado)))
+    return modulos, rss_kib
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--presupuesto-ms", type=float, default=PRESUPUESTO_MS)
+    parser.add_argument("--corridas", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        importtime(db_path)             # crea y siembra la BD
+        corridas = []
+        for _ in range(max(args.corridas, 1)):
+            modulos, rss_kib = importtime(db_path)
+            total = next(acum for nombre, _, acum in modulos if nombre == "app")
+            corridas.append((total, modulos, rss_kib))
+
+    corridas.sort(key=lambda c: c[0])
+    total_us, modulos, rss_kib = corridas[len(corridas) // 2]
+    total_ms = total_us / 1000
+    print(
+        f"import app: {total_ms:.0f} ms mediana de {len(corridas)} "
+        f"(mín {corridas[0][0] / 1000:.0f}, máx {corridas[-1][0] / 1000:.0f}; "
+        f"presupuesto {args.presupuesto_ms:.0f} ms)"
+    )
+    print(f"memoria máxima del proceso: {rss_kib / 1024:.0f} MiB\n")
+
+    print(f"{'acumulado ms':>12} {'propio ms':>10}  módulo")
+    for nombre, propio, acum in sorted(modulos, key=lambda m: m[2], reverse=True)[:args.top]:
+        print(f"{acum / 1000:12.1f} {propio / 1000:10.1f}  {nombre}")
+
+    errores = []
+    cargados = sorted({n.split(".")[0] for n, _, _ in modulos} & set(PROHIBIDOS))
+    if cargados:
+        errores.append(f"módulos que no deberían importarse al arrancar: {', '.join(cargados)}")
+    if total_ms > args.presupuesto_ms:
+        errores.append(f"import app tardó {total_ms:.0f} ms > {args.presupuesto_ms:.0f} ms")
+
+    for e in errores:
+        print(f"\nERROR: {e}")
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == "__main__":
+    main()
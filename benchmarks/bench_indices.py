@@ -0,0 +1,141 @@
+# benchmarks/bench_indices.py
+"""
+Planes y tiempos de las consultas calientes sobre Enrollment/Course, con
+el esquema anterior (solo claves primarias) y con los índices y el único
+(user_id, course_id) que agrega la migración 002.
+
+Uso:
+    python benchmarks/bench_indices.py [inscripciones]    # por defecto 500_000
+
+Solo usa sqlite3 de la biblioteca estándar. Para cada consulta muestra
+EXPLAIN QUERY PLAN (SCAN = recorre la tabla, SEARCH ... USING INDEX =
+búsqueda por índice) y la mediana de varias ejecuciones.
+"""
+
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+
+USUARIOS = 20_000
+CURSOS = 500
+PROFESORES = 50
+REPETICIONES = 15
+
+ESQUEMA = """
+    CREATE TABLE user (id INTEGER PRIMARY KEY, username TEXT UNIQUE NOT NULL, role TEXT NOT NULL);
+    CREATE TABLE course (id INTEGER PRIMARY KEY, nombre TEXT NOT NULL, teacher_id INTEGER);
+    CREATE TABLE enrollment (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        course_id INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        created_at DATETIME NOT NULL,
+        nota REAL
+    );
+"""
+
+# Lo que deja la migración 002 (mismos nombres que en la app)
+INDICES = """
+    CREATE UNIQUE INDEX uq_enrollment_user_course ON enrollment (user_id, course_id);
+    CREATE INDEX ix_enrollment_course_id ON enrollment (course_id);
+    CREATE INDEX ix_enrollment_created_at ON enrollment (created_at);
+    CREATE INDEX ix_course_teacher_id ON course (teacher_id);
+"""
+
+# (nombre, ruta de origen, SQL, parámetros)
+CONSULTAS = [
+    ("mis_cursos", "estudiante.mis_cursos",
+     "SELECT * FROM enrollment WHERE user_id = ?", (1234,)),
+    ("ya_inscripto", "courses.inscribirme",
+     "SELECT id FROM enrollment WHERE user_id = ? AND course_id = ? LIMIT 1", (1234, 77)),
+    ("inscripciones_curso", "profesor.gestionar_inscripciones_curso",
+     "SELECT e.*, u.username FROM enrollment e JOIN user u ON u.id = e.user_id "
+     "WHERE e.course_id = ?", (77,)),
+    ("cursos_profesor", "profesor.profesor_mis_cursos",
+     "SELECT * FROM course WHERE teacher_id = ?", (USUARIOS + 7,)),
+    ("notas_profesor", "stats (alcance profesor)",
+     "SELECT CAST(e.nota AS INTEGER), COUNT(e.id) FROM enrollment e "
+     "JOIN course c ON e.course_id = c.id "
+     "WHERE e.nota IS NOT NULL AND c.teacher_id = ? GROUP BY 1", (USUARIOS + 7,)),
+    ("actividad_rango", "rango de Enrollment.created_at",
+     "SELECT date(created_at), COUNT(id) FROM enrollment "
+     "WHERE created_at >= ? AND created_at < ? GROUP BY 1",
+     ("2024-03-01", "2024-04-01")),
+]
+
+
+def crear_bd(path, filas, con_indices):
+    con = sqlite3.connect(path)
+    con.executescript(ESQUEMA)
+    rnd = random.Random(42)
+
+    con.executemany(
+        "INSERT INTO user (id, username, role) VALUES (?, ?, ?)",
+        [(i, f"u{i}", "estudiante") for i in range(1, USUARIOS + 1)]
+        + [(USUARIOS + p, f"prof{p}", "profesor") for p in range(1, PROFESORES + 1)],
+    )
+    con.executemany(
+        "INSERT INTO course (id, nombre, teacher_id) VALUES (?, ?, ?)",
+        [(i, f"Curso {i}", USUARIOS + rnd.randint(1, PROFESORES)) for i in range(1, CURSOS + 1)],
+    )
+
+    # Pares (alumno, curso) únicos, con fechas a lo largo de 3 años
+    pares = set()
+    while len(pares) < filas:
+        pares.add((rnd.randint(1, USUARIOS), rnd.randint(1, CURSOS)))
+    base = time.mktime((2022, 1, 1, 0, 0, 0, 0, 0, -1))
+    con.executemany(
+        "INSERT INTO enrollment (user_id, course_id, status, created_at, nota) VALUES (?, ?, ?, ?, ?)",
+        (
+            (u, c, "entregado",
+             time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(base + rnd.random() * 3 * 365 * 86400)),
+             round(rnd.uniform(1, 10), 1) if rnd.random() < 0.6 else None)
+            for u, c in pares
+        ),
+    )
+    if con_indices:
+        con.executescript(INDICES)
+    con.execute("ANALYZE")
+    con.commit()
+    return con
+
+
+def plan(con, sql, params):
+    return "; ".join(fila[3] for fila in con.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+
+def medir(con, sql, params):
+    tiempos = []
+    for _ in range(REPETICIONES):
+        inicio = time.perf_counter()
+        con.execute(sql, params).fetchall()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Creando BDs con {filas:,} inscripciones...\n")
+        antes = crear_bd(os.path.join(tmp, "antes.db"), filas, con_indices=False)
+        despues = crear_bd(os.path.join(tmp, "despues.db"), filas, con_indices=True)
+
+        for nombre, origen, sql, params in CONSULTAS:
+            t_antes, t_despues = medir(antes, sql, params), medir(despues, sql, params)
+            print(f"{nombre}  ({origen})")
+            print(f"  antes:   {t_antes:9.3f} ms  {plan(antes, sql, params)}")
+            print(f"  después: {t_despues:9.3f} ms  {plan(despues, sql, params)}")
+            print()
+
+        antes.close()
+        despues.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/bench_notas.py
+"""
+Promedio de notas por curso: traer todas las filas a Python (como hacía
+estudiante_notas_png con pandas) vs. agregar en SQL (AVG/COUNT).
+
+Uso:
+    python benchmarks/bench_notas.py [filas]    # por defecto 1_000_000
+
+Solo usa sqlite3 de la biblioteca estándar; si pandas está instalado
+también mide el camino original con DataFrame.groupby.
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+CURSOS = 10
+
+
+def crear_bd(path, filas):
+    con = sqlite3.connect(path)
+    con.executescript("""
+        CREATE TABLE course (id INTEGER PRIMARY KEY, nombre TEXT NOT NULL);
+        CREATE TABLE enrollment (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            course_id INTEGER NOT NULL,
+            nota REAL
+        );
+    """)
+    con.executemany(
+        "INSERT INTO course (id, nombre) VALUES (?, ?)",
+        [(i, f"Curso {i}") for i in range(1, CURSOS + 1)],
+    )
+    rnd = random.Random(42)
+    lote = []
+    for i in range(filas):
+        nota = round(rnd.uniform(1, 10), 1) if rnd.random() < 0.8 else None
+        lote.append((i + 1, rnd.randint(1, 50_000), rnd.randint(1, CURSOS), nota))
+        if len(lote) == 50_000:
+            con.executemany("INSERT INTO enrollment VALUES (?, ?, ?, ?)", lote)
+            lote.clear()
+    if lote:
+        con.executemany("INSERT INTO enrollment VALUES (?, ?, ?, ?)", lote)
+    con.commit()
+    return con
+
+
+SQL_FILAS = """
+    SELECT c.nombre, e.nota FROM enrollment e
+    JOIN course c ON e.course_id = c.id
+    WHERE e.nota IS NOT NULL
+"""
+
+SQL_AGREGADO = """
+    SELECT c.nombre, AVG(e.nota), COUNT(e.nota) FROM enrollment e
+    JOIN course c ON e.course_id = c.id
+    WHERE e.nota IS NOT NULL
+    GROUP BY c.nombre ORDER BY c.nombre
+"""
+
+
+def en_python(con):
+    sumas, cantidades = {}, {}
+    for curso, nota in con.execute(SQL_FILAS).fetchall():
+        sumas[curso] = sumas.get(curso, 0.0) + nota
+        cantidades[curso] = cantidades.get(curso, 0) + 1
+    return {c: sumas[c] / cantidades[c] for c in sumas}
+
+
+def en_pandas(con):
+    import pandas as pd
+    df = pd.DataFrame(con.execute(SQL_FILAS).fetchall(), columns=["curso", "nota"])
+    return df.groupby("curso")["nota"].mean().to_dict()
+
+
+def en_sql(con):
+    return {curso: prom for curso, prom, _ in con.execute(SQL_AGREGADO).fetchall()}
+
+
+def medir(nombre, fn, con):
+    # Tiempo sin tracemalloc (lo ralentiza); memoria en una segunda pasada
+    inicio = time.perf_counter()
+    resultado = fn(con)
+    ms = (time.perf_counter() - inicio) * 1000
+
+    tracemalloc.start()
+    fn(con)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{nombre:<22} {ms:>9.1f} ms   pico {pico / 1024 / 1024:>8.1f} MiB   {len(resultado)} cursos")
+    return resultado
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        con = crear_bd(os.path.join(tmp, "bench.db"), filas)
+        print(f"{filas:,} inscripciones, {CURSOS} cursos\n")
+        a = medir("filas + Python", en_python, con)
+        try:
+            medir("filas + pandas", en_pandas, con)
+        except ImportError:
+            print("filas + pandas         (pandas no instalado)")
+        b = medir("AVG/COUNT en SQL", en_sql, con)
+        assert all(abs(a[k] - b[k]) < 1e-9 for k in a)
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
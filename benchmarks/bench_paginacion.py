@@ -0,0 +1,103 @@
+# benchmarks/bench_paginacion.py
+"""
+Catálogo de cursos: traer todo (Course.query.all(), lo que hacían los
+listados antes) vs. paginar con OFFSET vs. paginar por clave (nombre, id)
+como services/paginacion.py, a distintas profundidades.
+
+Uso:
+    python benchmarks/bench_paginacion.py [cursos] [por_pagina]
+    # por defecto 50_000 cursos, 24 por página
+
+Solo usa sqlite3 de la biblioteca estándar. El índice (nombre, id) es el
+que agrega la migración 003.
+"""
+
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+
+REPETICIONES = 15
+
+ESQUEMA = """
+    CREATE TABLE course (
+        id INTEGER PRIMARY KEY,
+        nombre TEXT NOT NULL,
+        descripcion TEXT,
+        precio REAL NOT NULL,
+        teacher_id INTEGER,
+        image_key TEXT
+    );
+    CREATE INDEX ix_course_nombre_id ON course (nombre, id);
+"""
+
+
+def crear_bd(path, cursos):
+    con = sqlite3.connect(path)
+    con.executescript(ESQUEMA)
+    rnd = random.Random(42)
+    con.executemany(
+        "INSERT INTO course (nombre, descripcion, precio, teacher_id) VALUES (?, ?, ?, ?)",
+        (
+            (f"Curso {rnd.randint(1, cursos // 3):06d}", "Descripción " * 20,
+             round(rnd.uniform(5, 200), 2), rnd.randint(1, 50))
+            for _ in range(cursos)
+        ),
+    )
+    con.execute("ANALYZE")
+    con.commit()
+    return con
+
+
+def medir(fn):
+    tiempos = []
+    for _ in range(REPETICIONES):
+        inicio = time.perf_counter()
+        fn()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def main():
+    cursos = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    tam = int(sys.argv[2]) if len(sys.argv) > 2 else 24
+
+    with tempfile.TemporaryDirectory() as tmp:
+        con = crear_bd(os.path.join(tmp, "bench.db"), cursos)
+        print(f"{cursos:,} cursos, {tam} por página\n")
+
+        t = medir(lambda: con.execute("SELECT * FROM course").fetchall())
+        print(f"todos (sin paginar)       {t:9.3f} ms")
+        t = medir(lambda: con.execute("SELECT COUNT(*) FROM course").fetchone())
+        print(f"COUNT(*) (total exacto)   {t:9.3f} ms\n")
+
+        print(f"{'página':>8}  {'OFFSET':>10}  {'por clave':>10}")
+        orden = [(n, i) for n, i in con.execute("SELECT nombre, id FROM course ORDER BY nombre, id")]
+        for pagina in (1, 10, 100, 1000, cursos // tam):
+            salto = (pagina - 1) * tam
+            if salto >= len(orden):
+                continue
+            t_offset = medir(lambda: con.execute(
+                "SELECT * FROM course ORDER BY nombre, id LIMIT ? OFFSET ?", (tam + 1, salto)
+            ).fetchall())
+            ultimo = orden[salto - 1] if salto else None
+            if ultimo is None:
+                t_clave = medir(lambda: con.execute(
+                    "SELECT * FROM course ORDER BY nombre, id LIMIT ?", (tam + 1,)
+                ).fetchall())
+            else:
+                t_clave = medir(lambda: con.execute(
+                    "SELECT * FROM course WHERE (nombre, id) > (?, ?) ORDER BY nombre, id LIMIT ?",
+                    (*ultimo, tam + 1),
+                ).fetchall())
+            print(f"{pagina:>8}  {t_offset:8.3f} ms  {t_clave:8.3f} ms")
+
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,17 @@
+import hashlib
+import math
+import time
+from datetime import datetime, timezone
+
 from flask import (
     Blueprint, render_template, redirect, url_for,
-    request, flash, current_app
+    request, flash, current_app, jsonify
 )
 from flask_login import login_required, current_user
+from sqlalchemy.exc import IntegrityError
 from services.s3 import subir_imagen_curso
+from services import fx, paginacion
+from stats import marcar_datos_modificados, resumen
 
 courses_bp = Blueprint("courses", __name__)
 
@@ -11,8 +19,23 @@ courses_bp = Blueprint("courses", __name__)
 def listar_cursos():
     """Catálogo público de cursos (página con el banner). No requiere login."""
     Course = current_app.Course
-    cursos = Course.query.all()
-    return render_template("cursos.html", cursos=cursos)
+    cursos = paginacion.paginar(
+        Course.query,
+        [Course.nombre, Course.id],
+        total=paginacion.total_aproximado(current_app.db, Course),
+    )
+
+    moneda = (request.args.get("moneda") or "").strip().upper() or None
+    precios, fx_error = fx.precios_en_moneda(cursos, moneda)
+
+    return render_template(
+        "cursos.html",
+        cursos=cursos,
+        pagina=cursos,
+        precios=precios,
+        moneda=moneda,
+        fx_error=fx_error,
+    )
 
 @courses_bp.route("/cursos/<int:course_id>")
 @login_required
@@ -58,6 +81,100 @@ def convertir_precio(course_id):
     )
 
 
+# ---------- API JSON de conversión ----------
+
+def _conversion_json(amount, moneda):
+    """(dict con el resultado, obtenida_en, error) para una moneda."""
+    tasa, obtenida_en, error = fx.obtener_tasa_detalle(moneda)
+    if error:
+        return None, None, error
+    fecha = (
+        datetime.fromtimestamp(obtenida_en, tz=timezone.utc).isoformat()
+        if obtenida_en else None
+    )
+    return {
+        "to": moneda,
+        "rate": tasa,
+        "result": round(amount * tasa, 2),
+        "rates_at": fecha,
+    }, obtenida_en, None
+
+
+def _respuesta_cacheable(data, claves, obtenida_en):
+    """
+    JSON con ETag derivado de la fecha de las tasas y Cache-Control hasta
+    que venzan. Si el navegador ya tiene esa versión responde 304.
+    """
+    resp = jsonify(data)
+    etag = hashlib.sha1(
+        f"{claves}|{obtenida_en or 0}".encode("utf-8")
+    ).hexdigest()
+    resp.set_etag(etag)
+    vigencia = fx.FX_CACHE_TTL
+    if obtenida_en:
+        vigencia = max(int(obtenida_en + fx.FX_CACHE_TTL - time.time()), 0)
+    resp.cache_control.private = True
+    resp.cache_control.max_age = vigencia
+    return resp.make_conditional(request)
+
+
+def _amount_de_request():
+    try:
+        amount = float((request.args.get("amount") or "").strip())
+    except ValueError:
+        return None
+    # float() acepta "nan"/"inf", que no se pueden devolver en JSON
+    return amount if math.isfinite(amount) else None
+
+
+@courses_bp.route("/api/fx/convert")
+@login_required
+def api_fx_convert():
+    """GET /api/fx/convert?amount=100&to=ARS"""
+    amount = _amount_de_request()
+    if amount is None:
+        return jsonify(error="amount debe ser numérico."), 400
+    moneda = (request.args.get("to") or "ARS").strip().upper()
+
+    resultado, obtenida_en, error = _conversion_json(amount, moneda)
+    if error:
+        return jsonify(error=error), 400 if error == "Moneda inválida." else 503
+
+    resultado.update({"amount": amount, "from": "USD"})
+    return _respuesta_cacheable(resultado, f"{amount}|{moneda}", obtenida_en)
+
+
+@courses_bp.route("/api/fx/convert/batch")
+@login_required
+def api_fx_convert_batch():
+    """GET /api/fx/convert/batch?amount=100&to=ARS,EUR,BRL"""
+    amount = _amount_de_request()
+    if amount is None:
+        return jsonify(error="amount debe ser numérico."), 400
+    monedas = [
+        m.strip().upper()
+        for m in (request.args.get("to") or ",".join(fx.FX_MONEDAS)).split(",")
+        if m.strip()
+    ]
+
+    resultados, errores, fechas = {}, {}, []
+    for moneda in monedas:
+        resultado, obtenida_en, error = _conversion_json(amount, moneda)
+        if error:
+            errores[moneda] = error
+            continue
+        resultados[moneda] = resultado
+        fechas.append(obtenida_en or 0)
+
+    if not resultados:
+        return jsonify(amount=amount, results={}, errors=errores), 503
+
+    data = {"amount": amount, "from": "USD", "results": resultados, "errors": errores}
+    return _respuesta_cacheable(
+        data, f"{amount}|{','.join(monedas)}|{sorted(errores)}", max(fechas)
+    )
+
+
 @courses_bp.route("/form_curso")
 @login_required
 def form_curso():
@@ -109,6 +226,7 @@ def agregar_curso():
         teacher_id=current_user.id,
         image_key=image_key,
     )
+    # Un curso nuevo no tiene inscripciones: no cambia ningún gráfico
     db.session.add(nuevo)
     db.session.commit()
 
@@ -161,6 +279,16 @@ def editar_curso(course_id):
             if new_key:
                 curso.image_key = new_key
 
+        # Los gráficos muestran el nombre: si cambia, se invalidan los del
+        # curso y los de sus alumnos
+        if nombre != curso.nombre:
+            Enrollment = current_app.Enrollment
+            alumnos = [
+                uid for (uid,) in
+                db.session.query(Enrollment.user_id).filter_by(course_id=curso.id)
+            ]
+            marcar_datos_modificados(cursos=[curso.id], estudiantes=alumnos)
+
         curso.nombre = nombre
         curso.descripcion = descripcion
         curso.precio = precio
@@ -191,6 +319,14 @@ def eliminar_curso(course_id):
     if current_user.role == "profesor" and curso.teacher_id != current_user.id:
         return render_template("403.html"), 403
 
+    # Las inscripciones se van con el curso (FK ON DELETE CASCADE); se
+    # borran explícitamente para descontarlas de los resúmenes (y subir la
+    # versión de los gráficos del curso y de sus alumnos)
+    Enrollment = current_app.Enrollment
+    inscripciones = Enrollment.query.filter_by(course_id=curso.id).all()
+    resumen.registrar_bajas(inscripciones)
+    Enrollment.query.filter_by(course_id=curso.id).delete(synchronize_session=False)
+
     db.session.delete(curso)
     db.session.commit()
     flash("Curso eliminado", "info")
@@ -229,6 +365,18 @@ def inscribirme(course_id):
         status="pendiente",
     )
     db.session.add(insc)
-    db.session.commit()
+    try:
+        # flush antes del upsert del resumen: si otra request inscribió al
+        # alumno en el medio, el IntegrityError salta acá y no en el autoflush
+        db.session.flush()
+        resumen.registrar_altas([insc])
+        db.session.commit()
+    except IntegrityError:
+        # Único (user_id, course_id): otra request lo inscribió en el medio.
+        # También puede ser la FK, si el curso se borró después del control.
+        db.session.rollback()
+        if Enrollment.query.filter_by(user_id=current_user.id, course_id=course_id).first():
+            return redirect(url_for("estudiante.mis_cursos", msg="ya_inscripto"))
+        return redirect(url_for("courses.listar_cursos", msg="curso_no_encontrado"))
 
     return redirect(url_for("estudiante.mis_cursos", msg="ok"))
\ No newline at end of file
@@ -2,6 +2,8 @@
 from flask import Blueprint, render_template, current_app, request
 from flask_login import login_required, current_user
 
+from services import fx, paginacion
+
 estudiante_bp = Blueprint("estudiante", __name__)
 
 
@@ -49,13 +51,23 @@ def estudiante_todos_cursos():
         return render_template("403.html"), 403
 
     Course = current_app.Course
-    cursos = Course.query.all()
+    cursos = paginacion.paginar(
+        Course.query,
+        [Course.nombre, Course.id],
+        total=paginacion.total_aproximado(current_app.db, Course),
+    )
 
     msg = request.args.get("msg")
+    moneda = (request.args.get("moneda") or "").strip().upper() or None
+    precios, fx_error = fx.precios_en_moneda(cursos, moneda)
 
     return render_template(
         "estudiante.html",
         cursos=cursos,
+        pagina=cursos,
         msg=msg,
         active="todos_cursos",
+        precios=precios,
+        moneda=moneda,
+        fx_error=fx_error,
     )
\ No newline at end of file
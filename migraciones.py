@@ -0,0 +1,365 @@
+# migraciones.py
+"""
+Migraciones de esquema.
+
+db.create_all() crea las tablas que faltan pero nunca modifica las que ya
+existen. Los cambios sobre tablas existentes van acá como migraciones
+numeradas; la tabla schema_version guarda la última aplicada.
+
+ - Se aplican al arrancar (app.py, después de create_all) o con
+   `flask schema upgrade`; `flask schema status` muestra las pendientes.
+ - Las que borran datos (DESTRUCTIVAS) no se aplican al arrancar si hay
+   algo para borrar: el arranque avisa y sigue con el esquema anterior
+   hasta que se corra `flask schema upgrade`. Lo borrado se copia antes a
+   otra tabla (p. ej. enrollment_descartadas).
+ - Todas las pendientes corren en una sola transacción: si una falla no
+   queda nada a medias. En SQLite la transacción es BEGIN IMMEDIATE y en
+   PostgreSQL se toma un advisory lock, así dos workers que arrancan a la
+   vez no las aplican dos veces.
+ - Cada migración es idempotente (mira el esquema antes de cambiarlo): en
+   una BD nueva create_all ya dejó el esquema final y solo se registran.
+
+Para agregar una: definir `def _mNNN_descripcion(conn, tablas)` y sumarla
+a MIGRACIONES.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import (
+    Column, DateTime, Float, Integer, MetaData, String, Table, delete, exists,
+    func, inspect, literal, or_, select, text, update,
+)
+from sqlalchemy.schema import AddConstraint, CreateTable, ForeignKeyConstraint, UniqueConstraint
+
+
+_meta_version = MetaData()
+schema_version = Table(
+    "schema_version",
+    _meta_version,
+    Column("version", Integer, nullable=False),
+    Column("aplicada_en", DateTime, nullable=False),
+)
+
+# Copia de las inscripciones que borra la migración 001, para revisarlas
+# o restaurarlas a mano
+enrollment_descartadas = Table(
+    "enrollment_descartadas",
+    _meta_version,
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    Column("user_id", Integer),
+    Column("course_id", Integer),
+    Column("status", String(20)),
+    Column("created_at", DateTime),
+    Column("nota", Float),
+    Column("motivo", String(20), nullable=False),
+    Column("descartada_en", DateTime, nullable=False),
+)
+
+# Clave del advisory lock de PostgreSQL para las migraciones
+_PG_LOCK = 7_240_019
+
+# Ids por sentencia IN (límite de parámetros de SQLite)
+_LOTE_IDS = 500
+
+
+# =========================
+# Migraciones
+# =========================
+
+def _inscripciones_a_descartar(conn, tablas):
+    """
+    [(id, motivo)] de las inscripciones huérfanas (alumno o curso que no
+    existe) y de las duplicadas (mismo alumno y curso). De cada grupo de
+    duplicadas se conserva la que tiene nota y, entre ellas (o si ninguna
+    tiene), la más nueva.
+    """
+    user, course, enrollment = tablas["user"], tablas["course"], tablas["enrollment"]
+
+    huerfanas = conn.execute(
+        select(enrollment.c.id).where(or_(
+            ~exists().where(user.c.id == enrollment.c.user_id),
+            ~exists().where(course.c.id == enrollment.c.course_id),
+        ))
+    ).scalars().all()
+    salida = [(i, "huerfana") for i in huerfanas]
+    vistas = set(huerfanas)
+
+    repetidos = conn.execute(
+        select(enrollment.c.user_id, enrollment.c.course_id)
+        .group_by(enrollment.c.user_id, enrollment.c.course_id)
+        .having(func.count() > 1)
+    ).all()
+    for user_id, course_id in repetidos:
+        ids = conn.execute(
+            select(enrollment.c.id)
+            .where(enrollment.c.user_id == user_id, enrollment.c.course_id == course_id)
+            .order_by(
+                enrollment.c.nota.is_(None),        # primero las que tienen nota
+                enrollment.c.created_at.desc(),
+                enrollment.c.id.desc(),
+            )
+        ).scalars().all()
+        salida += [(i, "duplicada") for i in ids[1:] if i not in vistas]
+    return salida
+
+
+def _m001_limpiar_inscripciones(conn, tablas):
+    """
+    Inscripciones huérfanas o duplicadas y cursos con profesor inexistente.
+    Las inscripciones descartadas se copian antes a enrollment_descartadas.
+    """
+    user, course, enrollment = tablas["user"], tablas["course"], tablas["enrollment"]
+
+    conn.execute(
+        update(course)
+        .where(
+            course.c.teacher_id.isnot(None),
+            ~exists().where(user.c.id == course.c.teacher_id),
+        )
+        .values(teacher_id=None)
+    )
+
+    descartes = _inscripciones_a_descartar(conn, tablas)
+    if not descartes:
+        return
+
+    enrollment_descartadas.create(conn, checkfirst=True)
+    ahora = datetime.utcnow()
+    por_motivo = {}
+    for enrollment_id, motivo in descartes:
+        por_motivo.setdefault(motivo, []).append(enrollment_id)
+    for motivo, ids in por_motivo.items():
+        for i in range(0, len(ids), _LOTE_IDS):
+            lote = ids[i:i + _LOTE_IDS]
+            conn.execute(enrollment_descartadas.insert().from_select(
+                ["id", "user_id", "course_id", "status", "created_at", "nota",
+                 "motivo", "descartada_en"],
+                select(
+                    enrollment.c.id, enrollment.c.user_id, enrollment.c.course_id,
+                    enrollment.c.status, enrollment.c.created_at, enrollment.c.nota,
+                    literal(motivo), literal(ahora),
+                ).where(enrollment.c.id.in_(lote)),
+            ))
+            conn.execute(delete(enrollment).where(enrollment.c.id.in_(lote)))
+
+    # Las tablas resumen ya no coinciden con Enrollment: vacías, app.py
+    # las recalcula al arrancar (o `flask stats rebuild`)
+    for nombre in ("stats_curso", "stats_curso_dia", "stats_estudiante_estado"):
+        if nombre in tablas:
+            conn.execute(delete(tablas[nombre]))
+
+    ids = sorted(i for i, _ in descartes)
+    muestra = ", ".join(str(i) for i in ids[:50]) + (" ..." if len(ids) > 50 else "")
+    print(f"[migraciones] {len(ids)} inscripciones huérfanas o duplicadas movidas a "
+          f"enrollment_descartadas (ids: {muestra})")
+
+
+def _m002_restricciones_e_indices(conn, tablas):
+    """FKs de Course/Enrollment, único (user_id, course_id) e índices de los modelos."""
+    # course antes que enrollment: enrollment la referencia
+    for nombre in ("course", "enrollment"):
+        tabla = tablas[nombre]
+        insp = inspect(conn)
+        if conn.dialect.name == "sqlite":
+            # SQLite no puede agregar FKs a una tabla existente
+            if tabla.foreign_keys and not insp.get_foreign_keys(nombre):
+                _reconstruir_sqlite(conn, tabla)
+            continue
+
+        existentes = {fk["name"] for fk in insp.get_foreign_keys(nombre)}
+        existentes |= {u["name"] for u in insp.get_unique_constraints(nombre)}
+        for restriccion in tabla.constraints:
+            if isinstance(restriccion, (ForeignKeyConstraint, UniqueConstraint)) \
+                    and restriccion.name not in existentes:
+                conn.execute(AddConstraint(restriccion))
+
+    _crear_indices(conn, tablas)
+
+
+def _m003_indice_catalogo(conn, tablas):
+    """Índice (nombre, id) de Course para el catálogo paginado."""
+    _crear_indices(conn, tablas)
+
+
+def _m004_indices_calificaciones(conn, tablas):
+    """Índices compuestos de Course y Enrollment para las calificaciones por profesor."""
+    _crear_indices(conn, tablas)
+    # Los reemplazan los compuestos, que empiezan por la misma columna
+    for nombre in ("ix_course_teacher_id", "ix_enrollment_course_id"):
+        conn.exec_driver_sql(f"DROP INDEX IF EXISTS {nombre}")
+
+
+MIGRACIONES = [
+    (1, "limpiar inscripciones huérfanas y duplicadas", _m001_limpiar_inscripciones),
+    (2, "FKs, único (user_id, course_id) e índices", _m002_restricciones_e_indices),
+    (3, "índice (nombre, id) del catálogo de cursos", _m003_indice_catalogo),
+    (4, "índices compuestos de las calificaciones por profesor", _m004_indices_calificaciones),
+]
+
+# Migraciones que borran datos -> función (conn, tablas) que devuelve las
+# filas que borraría. Al arrancar no se aplican si hay algo que borrar:
+# hace falta `flask schema upgrade`.
+DESTRUCTIVAS = {
+    1: _inscripciones_a_descartar,
+}
+
+
+# =========================
+# Helpers de esquema
+# =========================
+
+def _crear_indices(conn, tablas):
+    """Crea los índices declarados en los modelos que todavía no existen."""
+    for tabla in tablas.values():
+        for indice in tabla.indexes:
+            indice.create(conn, checkfirst=True)
+
+
+def _reconstruir_sqlite(conn, tabla):
+    """
+    Recrea `tabla` con la definición actual del modelo (restricciones
+    incluidas) y copia los datos: el procedimiento que recomienda SQLite
+    para cambios que ALTER TABLE no soporta. Requiere foreign_keys=OFF.
+    """
+    prep = conn.dialect.identifier_preparer
+    actual = prep.format_table(tabla)
+    nueva = prep.quote(f"{tabla.name}__nueva")
+
+    ddl = str(CreateTable(tabla).compile(dialect=conn.dialect)).strip()
+    ddl = ddl.replace(f"CREATE TABLE {actual} (", f"CREATE TABLE {nueva} (", 1)
+
+    viejas = {c["name"] for c in inspect(conn).get_columns(tabla.name)}
+    columnas = ", ".join(prep.quote(c.name) for c in tabla.columns if c.name in viejas)
+
+    conn.exec_driver_sql(ddl)
+    conn.exec_driver_sql(f"INSERT INTO {nueva} ({columnas}) SELECT {columnas} FROM {actual}")
+    conn.exec_driver_sql(f"DROP TABLE {actual}")
+    conn.exec_driver_sql(f"ALTER TABLE {nueva} RENAME TO {actual}")
+    # Los índices se fueron con la tabla vieja; los recrea _crear_indices
+
+
+@contextmanager
+def _transaccion(conn):
+    """Una transacción exclusiva para todas las migraciones pendientes."""
+    if conn.dialect.name == "sqlite":
+        # pysqlite maneja BEGIN por su cuenta y no incluye el DDL: se pasa
+        # a modo manual para que todo quede en una transacción atómica
+        dbapi = conn.connection.driver_connection
+        modo = dbapi.isolation_level
+        conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        dbapi.isolation_level = None
+        try:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                yield
+                violaciones = conn.exec_driver_sql("PRAGMA foreign_key_check").fetchall()
+                if violaciones:
+                    raise RuntimeError(f"Violaciones de FK después de migrar: {violaciones[:5]}")
+                conn.exec_driver_sql("COMMIT")
+            except Exception:
+                conn.exec_driver_sql("ROLLBACK")
+                raise
+        finally:
+            dbapi.isolation_level = modo
+            conn.exec_driver_sql("PRAGMA foreign_keys=ON")
+        return
+
+    with conn.begin():
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": _PG_LOCK})
+        yield
+
+
+def _version_actual(conn):
+    schema_version.create(conn, checkfirst=True)
+    return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+# =========================
+# API
+# =========================
+
+def pendientes(db):
+    """[(número, descripción)] de las migraciones sin aplicar."""
+    with db.engine.connect() as conn:
+        if not inspect(conn).has_table("schema_version"):
+            actual = 0
+        else:
+            actual = conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+    return [(n, d) for n, d, _ in MIGRACIONES if n > actual]
+
+
+def aplicar(db, al_arrancar=False):
+    """
+    Aplica las migraciones pendientes. Devuelve la lista de aplicadas.
+    Con `al_arrancar` se detiene antes de una migración DESTRUCTIVA que
+    tenga filas para borrar (y no aplica las siguientes): esas solo corren
+    con `flask schema upgrade`.
+    """
+    tablas = db.metadata.tables
+    aplicadas = []
+    with db.engine.connect() as conn:
+        with _transaccion(conn):
+            actual = _version_actual(conn)
+            for numero, descripcion, migracion in MIGRACIONES:
+                if numero <= actual:
+                    continue
+                if al_arrancar and numero in DESTRUCTIVAS:
+                    filas = DESTRUCTIVAS[numero](conn, tablas)
+                    if filas:
+                        print(
+                            f"[migraciones] {numero:03d} ({descripcion}) borraría "
+                            f"{len(filas)} filas: no se aplica al arrancar. Revisar con "
+                            f"`flask schema status` y aplicar con `flask schema upgrade`."
+                        )
+                        break
+                migracion(conn, tablas)
+                conn.execute(schema_version.insert().values(
+                    version=numero, aplicada_en=datetime.utcnow()
+                ))
+                aplicadas.append((numero, descripcion))
+
+    for numero, descripcion in aplicadas:
+        print(f"[migraciones] {numero:03d} aplicada: {descripcion}")
+    return aplicadas
+
+
+# =========================
+# CLI: flask schema ...
+# =========================
+
+@click.group("schema")
+def schema_cli():
+    """Migraciones de esquema de la base de datos."""
+
+
+@schema_cli.command("status")
+@with_appcontext
+def status_command():
+    """Muestra las migraciones pendientes."""
+    from flask import current_app
+    db = current_app.db
+    faltan = pendientes(db)
+    if not faltan:
+        click.echo("Esquema al día.")
+    with db.engine.connect() as conn:
+        for numero, descripcion in faltan:
+            click.echo(f"  pendiente {numero:03d}: {descripcion}")
+            if numero in DESTRUCTIVAS:
+                filas = DESTRUCTIVAS[numero](conn, db.metadata.tables)
+                if filas:
+                    ids = ", ".join(str(f[0]) for f in filas[:20])
+                    click.echo(f"    borraría {len(filas)} filas (ids: {ids}"
+                               f"{' ...' if len(filas) > 20 else ''})")
+
+
+@schema_cli.command("upgrade")
+@with_appcontext
+def upgrade_command():
+    """Aplica las migraciones pendientes."""
+    from flask import current_app
+    aplicadas = aplicar(current_app.db)
+    click.echo(f"{len(aplicadas)} migraciones aplicadas.")
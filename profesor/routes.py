@@ -1,10 +1,12 @@
 # profesor/routes.py
 from flask import (
     Blueprint, render_template, redirect,
-    url_for, request, flash, current_app
+    url_for, request, flash, current_app, jsonify
 )
 from flask_login import login_required, current_user
 
+from services import calificaciones, exportar, fx, importar, paginacion
+
 profesor_bp = Blueprint("profesor", __name__)
 
 
@@ -27,9 +29,15 @@ def profesor_mis_cursos():
     Course = current_app.Course
     cursos = Course.query.filter_by(teacher_id=current_user.id).all()
 
+    moneda = (request.args.get("moneda") or "").strip().upper() or None
+    precios, fx_error = fx.precios_en_moneda(cursos, moneda)
+
     return render_template(
         "cursos.html",
         cursos=cursos,
+        precios=precios,
+        moneda=moneda,
+        fx_error=fx_error,
         panel="profesor",
         titulo="Mis cursos",
         active="mis_cursos",
@@ -45,11 +53,22 @@ def profesor_todos_cursos():
         return render_template("403.html"), 403
 
     Course = current_app.Course
-    cursos = Course.query.all()
+    cursos = paginacion.paginar(
+        Course.query,
+        [Course.nombre, Course.id],
+        total=paginacion.total_aproximado(current_app.db, Course),
+    )
+
+    moneda = (request.args.get("moneda") or "").strip().upper() or None
+    precios, fx_error = fx.precios_en_moneda(cursos, moneda)
 
     return render_template(
         "cursos.html",
         cursos=cursos,
+        pagina=cursos,
+        precios=precios,
+        moneda=moneda,
+        fx_error=fx_error,
         panel="profesor",
         titulo="Todos los cursos",
         active="todos_cursos",
@@ -58,6 +77,23 @@ def profesor_todos_cursos():
 
 # ---------- Calificaciones ----------
 
+# ?orden= del libro de calificaciones -> (etiqueta, descendente). Cada
+# orden termina en columnas únicas, como pide la paginación por clave.
+ORDENES_CALIFICACIONES = {
+    "curso": ("Curso y alumno", False),
+    "alumno": ("Alumno y curso", False),
+    "reciente": ("Más recientes primero", True),
+}
+
+
+def _columnas_calificaciones(orden, Course, Enrollment, User):
+    if orden == "alumno":
+        return [User.username, Course.nombre, Course.id]
+    if orden == "reciente":
+        return [Enrollment.created_at, Enrollment.id]
+    return [Course.nombre, Course.id, User.username]
+
+
 @profesor_bp.route("/profesor/calificaciones")
 @login_required
 def profesor_calificaciones():
@@ -68,24 +104,113 @@ def profesor_calificaciones():
     Course = current_app.Course
     Enrollment = current_app.Enrollment
     User = current_app.User
+    StatsCurso = current_app.StatsCurso
+
+    mis_cursos = (
+        Course.query.filter_by(teacher_id=current_user.id)
+        .order_by(Course.nombre, Course.id)
+        .all()
+    )
+
+    curso_id = request.args.get("curso", type=int)
+    if curso_id is not None and curso_id not in {c.id for c in mis_cursos}:
+        return render_template("403.html"), 403
+    cursos_ids = [curso_id] if curso_id is not None else [c.id for c in mis_cursos]
 
-    filas = (
+    orden = request.args.get("orden")
+    if orden not in ORDENES_CALIFICACIONES:
+        orden = "curso"
+
+    query = (
         db.session.query(Enrollment, Course, User)
         .join(Course, Enrollment.course_id == Course.id)
         .join(User, Enrollment.user_id == User.id)
-        .order_by(Course.nombre.asc(), User.username.asc())
-        .all()
+        .filter(Course.teacher_id == current_user.id)
+    )
+    if curso_id is not None:
+        query = query.filter(Enrollment.course_id == curso_id)
+
+    # El total sale de la tabla resumen, sin contar Enrollment
+    total = 0
+    if cursos_ids:
+        total = (
+            db.session.query(db.func.sum(StatsCurso.inscripciones))
+            .filter(StatsCurso.course_id.in_(cursos_ids))
+            .scalar()
+        ) or 0
+
+    filas = paginacion.paginar(
+        query,
+        _columnas_calificaciones(orden, Course, Enrollment, User),
+        total=total,
+        descendente=ORDENES_CALIFICACIONES[orden][1],
     )
 
     return render_template(
         "profesor_calificaciones.html",
         filas=filas,
+        mis_cursos=mis_cursos,
+        curso_id=curso_id,
+        orden=orden,
+        ordenes=ORDENES_CALIFICACIONES,
         active="calificaciones",
     )
 
 
 # ---------- Edición de inscripciones por un curso ----------
 
+def _entradas_formulario(form):
+    """
+    Filas a calificar del formulario: las de la tabla (status_<id> /
+    nota_<id>, con orig_<id> = "status|nota" tal como se mostraron) o una
+    sola (enrollment_id, status, nota).
+    De la tabla solo se toman las filas que el profesor cambió, y con los
+    valores originales como "esperado", para no pisar lo que se haya
+    modificado después de cargar la página.
+    """
+    if form.get("enrollment_id"):
+        return [{
+            "enrollment_id": form.get("enrollment_id"),
+            "status": form.get("status"),
+            "nota": form.get("nota", ""),
+        }]
+
+    filas = {}
+    for campo, valor in form.items():
+        nombre, _, enrollment_id = campo.partition("_")
+        if nombre in ("status", "nota", "orig") and enrollment_id:
+            filas.setdefault(enrollment_id, {"enrollment_id": enrollment_id})[nombre] = valor
+
+    entradas = []
+    for fila in filas.values():
+        orig = fila.pop("orig", None)
+        if orig is not None:
+            status, _, nota = orig.partition("|")
+            if (fila.get("status", status), fila.get("nota", nota).strip()) == (status, nota):
+                continue
+            fila["esperado"] = {"status": status, "nota": nota}
+        entradas.append(fila)
+    return entradas
+
+
+def _calificar_json(course_id):
+    """
+    POST JSON: {"calificaciones": [{"enrollment_id", "status", "nota"}, ...],
+    "atomico": false} (o directamente la lista). Responde el resultado de
+    services.calificaciones.calificar; 422 si era atómico y hubo errores.
+    """
+    datos = request.get_json(silent=True)
+    atomico = False
+    if isinstance(datos, dict):
+        atomico = bool(datos.get("atomico"))
+        datos = datos.get("calificaciones")
+    if not isinstance(datos, list):
+        return jsonify(error="Se espera una lista de calificaciones."), 400
+
+    resultado = calificaciones.calificar(course_id, datos, atomico=atomico)
+    return jsonify(resultado), 422 if atomico and resultado["errores"] else 200
+
+
 @profesor_bp.route(
     "/profesor/curso/<int:course_id>/inscripciones",
     methods=["GET", "POST"],
@@ -103,37 +228,22 @@ def gestionar_inscripciones_curso(course_id):
     curso = Course.query.get_or_404(course_id)
 
     if request.method == "POST":
-        enroll_id_str = request.form.get("enrollment_id", "").strip()
-        status = (request.form.get("status") or "").strip()
-        nota_str = (request.form.get("nota") or "").strip()
-
-        try:
-            enroll_id = int(enroll_id_str)
-        except ValueError:
-            flash("ID de inscripción inválido.", "warning")
-            return redirect(url_for("profesor.gestionar_inscripciones_curso",
-                                    course_id=course_id))
-
-        insc = Enrollment.query.get(enroll_id)
-        if not insc or insc.course_id != course_id:
-            flash("Inscripción no encontrada.", "warning")
-            return redirect(url_for("profesor.gestionar_inscripciones_curso",
-                                    course_id=course_id))
-
-        allowed_status = ("pendiente", "entregado", "vencido")
-        if status in allowed_status:
-            insc.status = status
-
-        if nota_str == "":
-            insc.nota = None
-        else:
-            try:
-                insc.nota = float(nota_str)
-            except ValueError:
-                flash("La nota debe ser numérica.", "warning")
-
-        db.session.commit()
-        flash("Actualizado", "success")
+        if curso.teacher_id != current_user.id:
+            return render_template("403.html"), 403
+        if request.is_json:
+            return _calificar_json(course_id)
+
+        entradas = _entradas_formulario(request.form)
+        resultado = calificaciones.calificar(course_id, entradas)
+
+        if resultado["actualizadas"]:
+            flash(f"{resultado['actualizadas']} inscripciones actualizadas.", "success")
+        elif not resultado["errores"]:
+            flash("No hubo cambios.", "info")
+        for error in resultado["errores"][:10]:
+            flash(f"Inscripción {error['enrollment_id']}: {error['error']}", "warning")
+        if len(resultado["errores"]) > 10:
+            flash(f"... y {len(resultado['errores']) - 10} errores más.", "warning")
         return redirect(url_for("profesor.gestionar_inscripciones_curso",
                                 course_id=course_id))
 
@@ -151,3 +261,51 @@ def gestionar_inscripciones_curso(course_id):
         active="mis_cursos",  
         solo_lectura=False     
     )
+
+
+@profesor_bp.route("/profesor/curso/<int:course_id>/inscripciones.<any(csv, xlsx):formato>")
+@login_required
+def exportar_inscripciones_curso(course_id, formato):
+    if current_user.role != "profesor":
+        return render_template("403.html"), 403
+
+    curso = current_app.Course.query.get_or_404(course_id)
+    if curso.teacher_id != current_user.id:
+        return render_template("403.html"), 403
+
+    return exportar.respuesta(formato, f"inscripciones_{curso.nombre}", course_id)
+
+
+@profesor_bp.route("/profesor/curso/<int:course_id>/importar", methods=["POST"])
+@login_required
+def importar_inscripciones_curso(course_id):
+    if current_user.role != "profesor":
+        return render_template("403.html"), 403
+
+    curso = current_app.Course.query.get_or_404(course_id)
+    if curso.teacher_id != current_user.id:
+        return render_template("403.html"), 403
+
+    archivo = request.files.get("archivo")
+    if not archivo or not archivo.filename:
+        flash("Elegí un archivo CSV.", "warning")
+        return redirect(url_for("profesor.gestionar_inscripciones_curso", course_id=course_id))
+
+    try:
+        informe = importar.importar(
+            course_id,
+            archivo.stream,
+            simular=bool(request.form.get("simular")),
+            atomico=bool(request.form.get("atomico")),
+        )
+    except importar.ArchivoInvalido as e:
+        flash(str(e), "warning")
+        return redirect(url_for("profesor.gestionar_inscripciones_curso", course_id=course_id))
+
+    return render_template(
+        "profesor_importar.html",
+        curso=curso,
+        informe=informe,
+        archivo=archivo.filename,
+        active="mis_cursos",
+    )
@@ -0,0 +1,169 @@
+# services/calificaciones.py
+"""
+Calificación de las inscripciones de un curso, de a una o en lote.
+
+`calificar(course_id, entradas)` recibe las filas tal como llegan del
+formulario o del JSON ({"enrollment_id", "status", "nota"}), valida todas
+contra el curso con una sola consulta y aplica las válidas en una
+transacción: un UPDATE en lote por clave primaria (executemany) y un solo
+ajuste de las tablas resumen. Devuelve el resultado con los errores por
+fila en lugar de cortar en el primero.
+
+En cada entrada, "status" vacío o ausente deja el estado como está;
+"nota" ausente deja la nota, y vacía o null la borra. Opcionalmente
+"esperado": {"status", "nota"} con los valores que el cliente vio al
+cargar: si la inscripción cambió desde entonces (importación, API, otra
+pestaña) la fila se informa como error en vez de pisar ese cambio.
+"""
+
+import math
+
+from flask import current_app
+from sqlalchemy import update
+
+from stats import resumen
+
+
+ESTADOS = ("pendiente", "entregado", "vencido")
+NOTA_MIN, NOTA_MAX = 0.0, 10.0
+
+# Ids por consulta al validar (límite de parámetros de SQLite)
+_LOTE_IDS = 500
+
+
+def leer_status(valor):
+    """Estado válido, o None si viene vacío (sin cambio); ValueError si no es válido."""
+    if isinstance(valor, str):
+        valor = valor.strip()
+    if not valor:
+        return None
+    if valor not in ESTADOS:
+        raise ValueError(f"Estado inválido: {valor!r}.")
+    return valor
+
+
+def leer_nota(valor):
+    """Nota como float, o None si viene vacía (sin nota); ValueError si no es válida."""
+    if isinstance(valor, str):
+        valor = valor.strip().replace(",", ".")
+    if valor is None or valor == "":
+        return None
+    if isinstance(valor, bool):
+        raise ValueError("La nota debe ser numérica.")
+    try:
+        nota = float(valor)
+    except (TypeError, ValueError):
+        raise ValueError("La nota debe ser numérica.") from None
+    if not math.isfinite(nota) or not NOTA_MIN <= nota <= NOTA_MAX:
+        raise ValueError(f"La nota debe estar entre {NOTA_MIN:g} y {NOTA_MAX:g}.")
+    return nota
+
+
+def _leer(entrada):
+    """
+    (enrollment_id, {columna: valor nuevo}, (status, nota) esperados o None)
+    de una entrada; ValueError si no es válida.
+    """
+    if not isinstance(entrada, dict):
+        raise ValueError("La fila debe ser un objeto.")
+
+    valor = entrada.get("enrollment_id")
+    if isinstance(valor, bool):
+        raise ValueError("ID de inscripción inválido.")
+    try:
+        enrollment_id = int(str(valor).strip())
+    except ValueError:
+        raise ValueError("ID de inscripción inválido.") from None
+
+    cambios = {}
+    status = leer_status(entrada.get("status"))
+    if status is not None:
+        cambios["status"] = status
+    if "nota" in entrada:
+        cambios["nota"] = leer_nota(entrada["nota"])
+
+    esperado = entrada.get("esperado")
+    if esperado is not None:
+        if not isinstance(esperado, dict):
+            raise ValueError("\"esperado\" debe ser un objeto.")
+        esperado = (leer_status(esperado.get("status")), leer_nota(esperado.get("nota")))
+    return enrollment_id, cambios, esperado
+
+
+def calificar(course_id, entradas, atomico=False):
+    """
+    Valida y aplica `entradas` sobre las inscripciones de `course_id`, con
+    commit. Con `atomico`, si alguna fila tiene error no se aplica ninguna.
+    Devuelve {"actualizadas", "sin_cambios", "errores": [{"fila",
+    "enrollment_id", "error"}]}, con "fila" = posición en `entradas`.
+    """
+    db = current_app.db
+    Enrollment = current_app.Enrollment
+
+    errores = []
+    leidas = {}                     # enrollment_id -> (fila, cambios, esperado)
+    for fila, entrada in enumerate(entradas):
+        crudo = entrada.get("enrollment_id") if isinstance(entrada, dict) else None
+        try:
+            enrollment_id, cambios, esperado = _leer(entrada)
+        except ValueError as e:
+            errores.append({"fila": fila, "enrollment_id": crudo, "error": str(e)})
+            continue
+        if enrollment_id in leidas:
+            errores.append({"fila": fila, "enrollment_id": enrollment_id,
+                            "error": "Inscripción repetida en el envío."})
+            continue
+        leidas[enrollment_id] = (fila, cambios, esperado)
+
+    # Estado actual de todas en pocas consultas; en PostgreSQL quedan
+    # bloqueadas hasta el commit para que los deltas del resumen cuadren
+    actuales = {}
+    ids = list(leidas)
+    for i in range(0, len(ids), _LOTE_IDS):
+        filas = (
+            db.session.query(Enrollment.id, Enrollment.user_id, Enrollment.status, Enrollment.nota)
+            .filter(Enrollment.course_id == course_id, Enrollment.id.in_(ids[i:i + _LOTE_IDS]))
+            .with_for_update()
+            .all()
+        )
+        actuales.update({f.id: f for f in filas})
+
+    nuevos = []
+    cambios_resumen = []
+    sin_cambios = 0
+    for enrollment_id, (fila, cambios, esperado) in leidas.items():
+        actual = actuales.get(enrollment_id)
+        if actual is None:
+            errores.append({"fila": fila, "enrollment_id": enrollment_id,
+                            "error": "La inscripción no pertenece a este curso."})
+            continue
+        if esperado is not None and esperado != (actual.status, actual.nota):
+            errores.append({"fila": fila, "enrollment_id": enrollment_id,
+                            "error": "Cambió desde que se cargó la página; "
+                                     "recargá para ver el valor actual."})
+            continue
+        status = cambios.get("status", actual.status)
+        nota = cambios.get("nota", actual.nota)
+        if (status, nota) == (actual.status, actual.nota):
+            sin_cambios += 1
+            continue
+        nuevos.append({"id": enrollment_id, "status": status, "nota": nota})
+        cambios_resumen.append(
+            (course_id, actual.user_id, (actual.status, actual.nota), (status, nota))
+        )
+
+    errores.sort(key=lambda e: e["fila"])
+    if atomico and errores:
+        db.session.rollback()
+        return {"actualizadas": 0, "sin_cambios": 0, "errores": errores}
+
+    try:
+        if nuevos:
+            db.session.execute(update(Enrollment), nuevos)
+            resumen.registrar_cambios(cambios_resumen)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {"actualizadas": len(nuevos), "sin_cambios": sin_cambios, "errores": errores}
@@ -0,0 +1,164 @@
+# services/exportar.py
+"""
+Exportación de inscripciones y notas a CSV (en streaming) o XLSX.
+
+El CSV se genera mientras se lee la consulta: se ejecuta con yield_per
+(cursor del lado del servidor en PostgreSQL; en SQLite las filas salen
+del cursor a medida que se piden), se escribe de a EXPORTAR_LOTE filas y
+cada lote se manda apenas está listo. La memoria no depende de la
+cantidad de inscripciones y el primer byte sale antes de que la consulta
+termine. El orden es el de un índice ((course_id, created_at, id) por
+curso, la PK en el global), así la BD no tiene que ordenar todo antes de
+devolver la primera fila.
+
+XLSX es opcional (openpyxl, que se importa recién al pedirlo): un zip no
+se puede mandar antes de cerrarlo, así que se escribe en modo write_only
+(memoria constante) a un archivo temporal y se manda al terminar.
+"""
+
+import csv
+import io
+import os
+import tempfile
+from datetime import date
+
+from flask import Response, current_app, send_file, stream_with_context
+from sqlalchemy import select
+from werkzeug.utils import secure_filename
+
+
+# Filas por lote (yield_per y tamaño de cada pedazo del CSV)
+EXPORTAR_LOTE = int(os.getenv("EXPORTAR_LOTE") or 2000)
+
+COLUMNAS = ["enrollment_id", "course_id", "curso", "username", "status", "nota", "fecha_inscripcion"]
+
+TIPOS = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+class XlsxNoDisponible(Exception):
+    """openpyxl no está instalado."""
+
+
+def consulta(course_id=None):
+    """SELECT de las filas a exportar: las de un curso o todas."""
+    app = current_app
+    Course, Enrollment, User = app.Course, app.Enrollment, app.User
+
+    stmt = (
+        select(
+            Enrollment.id,
+            Enrollment.course_id,
+            Course.nombre,
+            User.username,
+            Enrollment.status,
+            Enrollment.nota,
+            Enrollment.created_at,
+        )
+        .join(Course, Course.id == Enrollment.course_id)
+        .join(User, User.id == Enrollment.user_id)
+    )
+    if course_id is not None:
+        stmt = stmt.where(Enrollment.course_id == course_id).order_by(
+            Enrollment.created_at, Enrollment.id
+        )
+    else:
+        stmt = stmt.order_by(Enrollment.id)
+    return stmt.execution_options(yield_per=EXPORTAR_LOTE)
+
+
+def _texto(valor):
+    # Una celda que empieza con = + - @ es una fórmula para Excel/LibreOffice
+    if valor and valor[0] in "=+-@":
+        return "'" + valor
+    return valor
+
+
+def _fila(r):
+    return [
+        r[0],
+        r[1],
+        _texto(r[2]),
+        _texto(r[3]),
+        r[4],
+        "" if r[5] is None else r[5],
+        r[6].strftime("%Y-%m-%d %H:%M:%S") if r[6] else "",
+    ]
+
+
+def csv_en_streaming(course_id=None):
+    """
+    Generador de pedazos de texto del CSV. Usarlo dentro de
+    stream_with_context: la sesión tiene que seguir abierta mientras se
+    consume.
+    """
+    db = current_app.db
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+
+    # BOM: Excel abre bien los acentos; la importación lo ignora
+    buffer.write("\ufeff")
+    escritor.writerow(COLUMNAS)
+    yield buffer.getvalue()
+
+    resultado = db.session.execute(consulta(course_id))
+    try:
+        for lote in resultado.partitions():
+            buffer.seek(0)
+            buffer.truncate()
+            escritor.writerows(_fila(r) for r in lote)
+            yield buffer.getvalue()
+    finally:
+        resultado.close()
+
+
+def xlsx_a_archivo(course_id=None):
+    """
+    Escribe el XLSX en un archivo temporal y lo devuelve abierto al
+    principio. Lanza XlsxNoDisponible si falta openpyxl.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise XlsxNoDisponible("Exportar a XLSX requiere openpyxl (pip install openpyxl).") from None
+
+    db = current_app.db
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet("Inscripciones")
+    hoja.append(COLUMNAS)
+
+    resultado = db.session.execute(consulta(course_id))
+    try:
+        for lote in resultado.partitions():
+            for r in lote:
+                hoja.append([r[0], r[1], _texto(r[2]), _texto(r[3]), r[4], r[5], r[6]])
+    finally:
+        resultado.close()
+
+    archivo = tempfile.TemporaryFile()
+    libro.save(archivo)
+    archivo.seek(0)
+    return archivo
+
+
+def respuesta(formato, nombre, course_id=None):
+    """
+    Respuesta de descarga en `formato` ("csv" o "xlsx"), con archivo
+    `<nombre>_<fecha>.<formato>`; 501 si se pide XLSX sin openpyxl.
+    """
+    archivo = f"{secure_filename(nombre) or 'inscripciones'}_{date.today():%Y%m%d}.{formato}"
+
+    if formato == "xlsx":
+        try:
+            datos = xlsx_a_archivo(course_id)
+        except XlsxNoDisponible as e:
+            return Response(str(e), status=501, mimetype="text/plain")
+        return send_file(datos, mimetype=TIPOS["xlsx"], as_attachment=True, download_name=archivo)
+
+    resp = Response(stream_with_context(csv_en_streaming(course_id)), mimetype=TIPOS["csv"])
+    resp.headers["Content-Disposition"] = f'attachment; filename="{archivo}"'
+    # Que ningún proxy lo junte entero antes de mandarlo
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
@@ -0,0 +1,885 @@
+# services/fx.py
+"""
+Tasas de cambio USD -> otras monedas.
+
+Se descarga la tabla completa de tasas USD de un proveedor y se guarda
+en memoria por moneda (con TTL). Las conversiones se hacen localmente,
+sin llamadas HTTP mientras haya una tasa utilizable: un hilo de fondo
+renueva la tabla antes de que venza y, si igual vence, se sigue usando
+la última tasa buena mientras se renueva (hasta FX_MAX_STALE).
+
+Cada tabla descargada se guarda como snapshot en la BD (FxSnapshot): un
+proceso nuevo arranca con la última tabla guardada y, si otro proceso ya
+la renovó hace poco, la toma de la BD en vez de llamar a los proveedores.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+FX_API_BASE = os.getenv("FX_API_BASE", "https://api.exchangerate.host")
+FX_API_FALLBACK = os.getenv("FX_API_FALLBACK", "https://open.er-api.com/v6")
+FX_API_ALT = os.getenv("FX_API_ALT", "https://api.frankfurter.app")
+
+# Segundos que una tasa se considera vigente.
+FX_CACHE_TTL = int(os.getenv("FX_CACHE_TTL") or 900)
+# Máximo de monedas guardadas en memoria (se descartan las menos usadas).
+FX_CACHE_MAX = int(os.getenv("FX_CACHE_MAX") or 200)
+# Edad máxima (segundos) de una tasa vencida que todavía se puede servir.
+FX_MAX_STALE = int(os.getenv("FX_MAX_STALE") or 6 * 3600)
+
+# Refresco en segundo plano de las monedas que ofrece la UI.
+FX_MONEDAS = [
+    m.strip().upper()
+    for m in (os.getenv("FX_MONEDAS") or "ARS,EUR,BRL").split(",")
+    if m.strip()
+]
+FX_REFRESCO = (os.getenv("FX_REFRESCO") or "1").lower() not in ("0", "false", "no")
+FX_REFRESCO_INTERVALO = float(os.getenv("FX_REFRESCO_INTERVALO") or FX_CACHE_TTL * 0.8)
+# Espera aleatoria antes del primer refresco, para que los workers que
+# arrancan juntos no llamen todos a la vez a los proveedores.
+FX_REFRESCO_JITTER = float(os.getenv("FX_REFRESCO_JITTER") or 30)
+# Días de historial de snapshots que se conservan en la BD.
+FX_SNAPSHOTS_DIAS = int(os.getenv("FX_SNAPSHOTS_DIAS") or 90)
+# Segundos que se recuerda que una moneda no se pudo obtener, para no
+# volver a consultar a los proveedores en cada request.
+FX_FALLO_TTL = float(os.getenv("FX_FALLO_TTL") or 60)
+
+# (connect, read) por defecto; se puede ajustar por proveedor con
+# FX_TIMEOUTS="open.er-api.com=2:4,frankfurter.app=1.5:3"
+FX_TIMEOUT_CONNECT = float(os.getenv("FX_TIMEOUT_CONNECT") or 2)
+FX_TIMEOUT_READ = float(os.getenv("FX_TIMEOUT_READ") or 4)
+FX_TIMEOUTS = os.getenv("FX_TIMEOUTS") or ""
+
+# Conexiones keep-alive por proveedor y reintentos ante 429/5xx.
+FX_POOL_SIZE = int(os.getenv("FX_POOL_SIZE") or 4)
+FX_RETRIES = int(os.getenv("FX_RETRIES") or 2)
+FX_BACKOFF = float(os.getenv("FX_BACKOFF") or 0.2)
+
+# Circuit breaker por proveedor: se abre si en las últimas FX_CB_VENTANA
+# consultas hubo al menos FX_CB_MIN_FALLOS fallos y la tasa de error
+# supera FX_CB_TASA_ERROR; queda abierto FX_CB_ESPERA segundos y luego
+# deja pasar una consulta de prueba (semiabierto).
+FX_CB_VENTANA = int(os.getenv("FX_CB_VENTANA") or 10)
+FX_CB_MIN_FALLOS = int(os.getenv("FX_CB_MIN_FALLOS") or 3)
+FX_CB_TASA_ERROR = float(os.getenv("FX_CB_TASA_ERROR") or 0.5)
+FX_CB_ESPERA = float(os.getenv("FX_CB_ESPERA") or 30)
+
+# Consulta "cubierta": si el proveedor principal no contesta en
+# FX_HEDGE_DELAY segundos se lanza el siguiente en paralelo y gana la
+# primera respuesta válida. FX_HEDGE=0 vuelve al modo secuencial.
+FX_HEDGE = (os.getenv("FX_HEDGE") or "1").lower() not in ("0", "false", "no")
+FX_HEDGE_DELAY = float(os.getenv("FX_HEDGE_DELAY") or 0.3)
+# Tiempo máximo total que un request espera a los proveedores.
+FX_DEADLINE = float(os.getenv("FX_DEADLINE") or 6)
+
+ERROR_PROVEEDORES = "Todas las APIs fallaron o no están disponibles ahora."
+
+
+# moneda -> (tasa, obtenida_en, proveedor)
+_tasas = OrderedDict()
+_tasas_lock = threading.Lock()
+# Monedas vistas en alguna tabla (sobreviven al descarte por FX_CACHE_MAX).
+_monedas_conocidas = set()
+# moneda -> momento (monotonic) hasta el que se responde error sin red
+_fallos = {}
+
+# Descargas en curso por moneda (None = tabla completa), para que varios
+# hilos no descarguen lo mismo a la vez. El lock solo protege el registro,
+# nunca se mantiene durante una llamada a la red.
+_descargas = {}
+_descarga_lock = threading.Lock()
+
+_pool = ThreadPoolExecutor(max_workers=6, thread_name_prefix="fx")
+
+
+# =========================
+# HTTP (sesiones por proveedor)
+# =========================
+
+# (base, con reintentos de urllib3) -> (pid, requests.Session). El pid evita
+# reutilizar sockets heredados de otro proceso (fork de gunicorn).
+_sesiones = {}
+_sesiones_lock = threading.Lock()
+
+# base -> contadores de tiempos
+_metricas = {}
+_metricas_lock = threading.Lock()
+
+# Respuestas ante las que se reintenta
+_STATUS_REINTENTO = (429, 500, 502, 503, 504)
+
+
+def _nueva_sesion(reintentos=True):
+    retry = Retry(
+        total=FX_RETRIES,
+        connect=FX_RETRIES,
+        read=FX_RETRIES,
+        status=FX_RETRIES,
+        backoff_factor=FX_BACKOFF,
+        backoff_jitter=FX_BACKOFF,
+        backoff_max=2,
+        status_forcelist=_STATUS_REINTENTO,
+        allowed_methods=frozenset({"GET"}),
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=FX_POOL_SIZE,
+        # Sin reintentos de urllib3 en la consulta cubierta: los hace _get,
+        # acotados al tiempo que le queda.
+        max_retries=retry if reintentos else 0,
+    )
+    sesion = requests.Session()
+    sesion.mount("https://", adapter)
+    sesion.mount("http://", adapter)
+    sesion.headers["Connection"] = "keep-alive"
+    return sesion
+
+
+def _sesion(base, reintentos=True):
+    pid = os.getpid()
+    clave = (base, reintentos)
+    with _sesiones_lock:
+        item = _sesiones.get(clave)
+        if item is None or item[0] != pid:
+            item = (pid, _nueva_sesion(reintentos))
+            _sesiones[clave] = item
+        return item[1]
+
+
+def _timeout(base):
+    for parte in FX_TIMEOUTS.split(","):
+        host, _, valores = parte.strip().partition("=")
+        if host and host in base:
+            connect, _, read = valores.partition(":")
+            try:
+                return float(connect), float(read or connect)
+            except ValueError:
+                break
+    return FX_TIMEOUT_CONNECT, FX_TIMEOUT_READ
+
+
+def _conexiones_abiertas(sesion, url):
+    try:
+        pool = sesion.get_adapter(url).poolmanager.connection_from_url(url)
+        return pool.num_connections
+    except Exception:
+        return 0
+
+
+def _registrar(base, ms, conexion_nueva, error=False):
+    with _metricas_lock:
+        m = _metricas.setdefault(base, {
+            "peticiones": 0,
+            "errores": 0,
+            "conexiones_nuevas": 0,
+            "ms_conexion_nueva": 0.0,
+            "ms_reutilizada": 0.0,
+        })
+        m["peticiones"] += 1
+        if error:
+            m["errores"] += 1
+            return
+        if conexion_nueva:
+            m["conexiones_nuevas"] += 1
+            m["ms_conexion_nueva"] += ms
+        else:
+            m["ms_reutilizada"] += ms
+
+
+def _get_una_vez(base, url, params, sesion, timeout):
+    """Un GET; registra si abrió conexión nueva."""
+    antes = _conexiones_abiertas(sesion, url)
+    inicio = time.perf_counter()
+    try:
+        r = sesion.get(url, params=params, timeout=timeout)
+    except requests.RequestException:
+        _registrar(base, 0, False, error=True)
+        raise
+    ms = (time.perf_counter() - inicio) * 1000
+    _registrar(base, ms, _conexiones_abiertas(sesion, url) > antes, error=not r.ok)
+    return r
+
+
+def _espera_reintento(intento):
+    """Backoff exponencial con jitter, el mismo criterio que el Retry de la sesión."""
+    return min(FX_BACKOFF * 2 ** (intento - 1) + random.uniform(0, FX_BACKOFF), 2)
+
+
+def _get(base, path, params=None, limite=None):
+    """
+    GET con la sesión del proveedor, con hasta FX_RETRIES reintentos ante
+    429/5xx o errores de conexión (backoff con jitter).
+    Con `limite` (time.monotonic) los reintentos los hace esta función y
+    nunca pasan de ese momento: cada intento recorta sus timeouts al tiempo
+    que queda y no se espera un backoff que no entra antes del límite.
+    """
+    url = f"{base}{path}"
+    if limite is None:
+        return _get_una_vez(base, url, params, _sesion(base), _timeout(base))
+
+    sesion = _sesion(base, reintentos=False)
+    intento = 0
+    while True:
+        restante = limite - time.monotonic()
+        if restante <= 0:
+            raise requests.Timeout(f"Sin tiempo para consultar {base}")
+        timeout = tuple(min(t, restante) for t in _timeout(base))
+        try:
+            r, error = _get_una_vez(base, url, params, sesion, timeout), None
+            if r.status_code not in _STATUS_REINTENTO:
+                return r
+        except (requests.ConnectionError, requests.Timeout) as e:
+            r, error = None, e
+
+        intento += 1
+        espera = _espera_reintento(intento)
+        if intento > FX_RETRIES or time.monotonic() + espera >= limite:
+            if error is not None:
+                raise error
+            return r
+        time.sleep(espera)
+
+
+def metricas_http():
+    """
+    Tiempos por proveedor. La diferencia entre el promedio con conexión
+    nueva (TCP+TLS) y con conexión reutilizada es lo que ahorra el pool.
+    """
+    salida = {}
+    with _metricas_lock:
+        for base, m in _metricas.items():
+            nuevas = m["conexiones_nuevas"]
+            reutilizadas = m["peticiones"] - m["errores"] - nuevas
+            prom_nueva = m["ms_conexion_nueva"] / nuevas if nuevas else None
+            prom_reut = m["ms_reutilizada"] / reutilizadas if reutilizadas else None
+            salida[base] = {
+                "peticiones": m["peticiones"],
+                "errores": m["errores"],
+                "conexiones_nuevas": nuevas,
+                "ms_promedio_conexion_nueva": prom_nueva,
+                "ms_promedio_reutilizada": prom_reut,
+                "ms_ahorro_por_peticion": (
+                    prom_nueva - prom_reut
+                    if prom_nueva is not None and prom_reut is not None
+                    else None
+                ),
+            }
+    return salida
+
+
+# =========================
+# Proveedores
+# =========================
+
+def _tabla_exchangerate_host(base, limite=None):
+    r = _get(base, "/latest", params={"base": "USD"}, limite=limite)
+    if not r.ok:
+        return None
+    data = r.json()
+    if data.get("rates"):
+        return data["rates"]
+    # API nueva: {"quotes": {"USDARS": 1000.0, ...}}
+    quotes = data.get("quotes") or {}
+    return {k[3:]: v for k, v in quotes.items() if k.startswith("USD")} or None
+
+
+def _tabla_open_er_api(base, limite=None):
+    r = _get(base, "/latest/USD", limite=limite)
+    if not r.ok:
+        return None
+    data = r.json()
+    if data.get("result") != "success":
+        return None
+    return data.get("rates") or data.get("conversion_rates")
+
+
+def _tabla_frankfurter(base, limite=None):
+    # frankfurter.app es estable, pero NO tiene ARS
+    r = _get(base, "/latest", params={"from": "USD"}, limite=limite)
+    if not r.ok:
+        return None
+    rates = r.json().get("rates")
+    if not rates:
+        return None
+    return {"USD": 1.0, **rates}
+
+
+def _parser_para(base):
+    if "exchangerate.host" in base:
+        return _tabla_exchangerate_host
+    if "open-er-api" in base or "open.er-api.com" in base:
+        return _tabla_open_er_api
+    if "frankfurter.app" in base:
+        return _tabla_frankfurter
+    return None
+
+
+# =========================
+# Circuit breaker y salud
+# =========================
+
+CERRADO = "cerrado"
+ABIERTO = "abierto"
+SEMIABIERTO = "semiabierto"
+
+
+class _Breaker:
+    """Estado de un proveedor: ventana de resultados y latencia EWMA."""
+
+    ALFA = 0.3
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.estado = CERRADO
+        self.resultados = deque(maxlen=FX_CB_VENTANA)
+        self.latencia_ms = None
+        self.abierto_desde = None
+        self.en_prueba = None   # momento en que se lanzó la consulta de prueba
+        self.aperturas = 0
+
+    def permite(self, ahora=None):
+        ahora = ahora or time.monotonic()
+        with self.lock:
+            if self.estado == CERRADO:
+                return True
+            if self.estado == ABIERTO and ahora - self.abierto_desde >= FX_CB_ESPERA:
+                self.estado = SEMIABIERTO
+                self.en_prueba = None
+            # Si la prueba anterior nunca se lanzó (la ganó otro proveedor),
+            # se permite otra pasado FX_CB_ESPERA.
+            if self.estado == SEMIABIERTO and (
+                self.en_prueba is None or ahora - self.en_prueba >= FX_CB_ESPERA
+            ):
+                self.en_prueba = ahora
+                return True
+            return False
+
+    def tasa_error(self):
+        if not self.resultados:
+            return 0.0
+        return self.resultados.count(False) / len(self.resultados)
+
+    def registrar(self, ok, ms):
+        with self.lock:
+            self.resultados.append(ok)
+            if ok:
+                if self.latencia_ms is None:
+                    self.latencia_ms = ms
+                else:
+                    self.latencia_ms = self.ALFA * ms + (1 - self.ALFA) * self.latencia_ms
+                if self.estado != CERRADO:
+                    self.estado = CERRADO
+                    self.resultados.clear()
+                    self.resultados.append(True)
+                self.en_prueba = None
+                return
+
+            if self.estado == SEMIABIERTO or (
+                self.resultados.count(False) >= FX_CB_MIN_FALLOS
+                and self.tasa_error() >= FX_CB_TASA_ERROR
+            ):
+                if self.estado != ABIERTO:
+                    self.aperturas += 1
+                self.estado = ABIERTO
+                self.abierto_desde = time.monotonic()
+            self.en_prueba = None
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def _breaker(base):
+    with _breakers_lock:
+        if base not in _breakers:
+            _breakers[base] = _Breaker()
+        return _breakers[base]
+
+
+def proveedores():
+    return [FX_API_BASE, FX_API_FALLBACK, FX_API_ALT]
+
+
+def proveedores_ordenados():
+    """
+    Proveedores que el breaker deja consultar, el más rápido primero.
+    Los que aún no tienen latencia medida conservan el orden configurado
+    detrás de los ya medidos.
+    """
+    candidatos = []
+    for i, base in enumerate(proveedores()):
+        if _parser_para(base) is None:
+            continue
+        b = _breaker(base)
+        if not b.permite():
+            continue
+        lat = b.latencia_ms if b.latencia_ms is not None else float("inf")
+        candidatos.append((lat, i, base))
+    return [base for _, _, base in sorted(candidatos)]
+
+
+def estado_proveedores():
+    """Estado de cada proveedor para monitoreo (breaker + tiempos HTTP)."""
+    http = metricas_http()
+    salida = []
+    for base in proveedores():
+        b = _breaker(base)
+        with b.lock:
+            salida.append({
+                "proveedor": base,
+                "estado": b.estado,
+                "tasa_error": round(b.tasa_error(), 3),
+                "latencia_ewma_ms": (
+                    round(b.latencia_ms, 1) if b.latencia_ms is not None else None
+                ),
+                "aperturas": b.aperturas,
+                "http": http.get(base),
+            })
+    return salida
+
+
+def _consultar(base, moneda, limite=None):
+    """
+    Tabla de un proveedor, o None si falla o no trae `moneda`.
+    `limite` acota la consulta completa (ver _get).
+    """
+    parser = _parser_para(base)
+    if parser is None:
+        return None
+    inicio = time.perf_counter()
+    try:
+        tabla = parser(base, limite)
+    except (requests.RequestException, ValueError):
+        tabla = None
+    # Una tabla sin la moneda pedida no es un fallo del proveedor
+    _breaker(base).registrar(bool(tabla), (time.perf_counter() - inicio) * 1000)
+    if tabla and (moneda is None or tabla.get(moneda)):
+        return tabla
+    return None
+
+
+def _descargar_secuencial(moneda):
+    for base in proveedores_ordenados():
+        tabla = _consultar(base, moneda)
+        if tabla:
+            return tabla, base
+    return None, None
+
+
+def _descargar_cubierto(moneda):
+    """
+    Lanza los proveedores escalonados (FX_HEDGE_DELAY) sin esperar a que
+    termine el anterior; si uno falla se lanza el siguiente enseguida.
+    Devuelve la primera tabla válida. Lo que sigue en curso se cancela
+    (si no empezó) o se descarta; cada consulta (reintentos incluidos) está
+    acotada al tiempo que queda, así que no ocupa un hilo del pool más allá
+    de FX_DEADLINE.
+    """
+    bases = proveedores_ordenados()
+    pendientes = {}
+    lanzados = 0
+    limite = time.monotonic() + FX_DEADLINE
+    proximo = time.monotonic()
+
+    try:
+        while True:
+            ahora = time.monotonic()
+            if lanzados < len(bases) and (not pendientes or ahora >= proximo):
+                base = bases[lanzados]
+                pendientes[_pool.submit(_consultar, base, moneda, limite)] = base
+                lanzados += 1
+                proximo = ahora + FX_HEDGE_DELAY
+
+            if not pendientes or ahora >= limite:
+                return None, None
+
+            espera = limite - ahora
+            if lanzados < len(bases):
+                espera = min(espera, max(proximo - ahora, 0))
+
+            hechos, _ = wait(pendientes, timeout=espera, return_when=FIRST_COMPLETED)
+            for f in hechos:
+                base = pendientes.pop(f)
+                tabla = f.result()
+                if tabla:
+                    return tabla, base
+                # Falló: no esperamos el delay para lanzar el siguiente
+                proximo = time.monotonic()
+    finally:
+        for f in pendientes:
+            f.cancel()
+
+
+def descargar_tabla(moneda=None):
+    """
+    Pide la tabla completa de tasas USD a los proveedores.
+    Si se indica `moneda`, se descarta una tabla que no la incluya.
+    Devuelve (tabla, proveedor) o (None, None).
+    """
+    if FX_HEDGE:
+        return _descargar_cubierto(moneda)
+    return _descargar_secuencial(moneda)
+
+
+# =========================
+# Caché
+# =========================
+
+def _guardar_tabla(tabla, proveedor, ahora=None):
+    ahora = ahora or time.time()
+    with _tasas_lock:
+        for moneda, tasa in tabla.items():
+            try:
+                tasa = float(tasa)
+            except (TypeError, ValueError):
+                continue
+            _tasas[moneda.upper()] = (tasa, ahora, proveedor)
+            _tasas.move_to_end(moneda.upper())
+            _monedas_conocidas.add(moneda.upper())
+            _fallos.pop(moneda.upper(), None)
+        while len(_tasas) > FX_CACHE_MAX:
+            _tasas.popitem(last=False)
+
+
+def _tasa_en_cache(moneda, ahora=None):
+    """
+    (tasa, edad en segundos, obtenida_en) o None.
+    Descarta lo que supera FX_MAX_STALE.
+    """
+    ahora = ahora or time.time()
+    with _tasas_lock:
+        item = _tasas.get(moneda)
+        if item is None:
+            return None
+        tasa, obtenida_en, _ = item
+        edad = ahora - obtenida_en
+        if edad > FX_MAX_STALE:
+            del _tasas[moneda]
+            return None
+        _tasas.move_to_end(moneda)
+        return tasa, edad, obtenida_en
+
+
+def limpiar_cache():
+    with _tasas_lock:
+        _tasas.clear()
+        _monedas_conocidas.clear()
+        _fallos.clear()
+
+
+def _moneda_conocida(moneda):
+    """True si `moneda` está en FX_MONEDAS o vino en alguna tabla."""
+    if moneda in FX_MONEDAS:
+        return True
+    with _tasas_lock:
+        return moneda in _monedas_conocidas
+
+
+def _fallo_reciente(moneda):
+    with _tasas_lock:
+        hasta = _fallos.get(moneda)
+        if hasta is None:
+            return False
+        if time.monotonic() >= hasta:
+            del _fallos[moneda]
+            return False
+        return True
+
+
+def _registrar_fallo(moneda):
+    with _tasas_lock:
+        _fallos[moneda] = time.monotonic() + FX_FALLO_TTL
+
+
+# =========================
+# Snapshots en BD
+# =========================
+
+# App Flask con el modelo FxSnapshot (ver init_app)
+_app = None
+
+
+def _a_datetime(ts):
+    return datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None)
+
+
+def _a_timestamp(dt):
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+
+def guardar_snapshot(tabla, proveedor, obtenida_en=None):
+    """Guarda la tabla en la BD y poda el historial viejo."""
+    if _app is None:
+        return
+    obtenida_en = obtenida_en or time.time()
+    try:
+        with _app.app_context():
+            db = _app.db
+            FxSnapshot = _app.FxSnapshot
+            db.session.add(FxSnapshot(
+                proveedor=proveedor,
+                tasas=json.dumps(tabla),
+                obtenida_en=_a_datetime(obtenida_en),
+            ))
+            limite = _a_datetime(obtenida_en) - timedelta(days=FX_SNAPSHOTS_DIAS)
+            FxSnapshot.query.filter(FxSnapshot.obtenida_en < limite).delete()
+            db.session.commit()
+    except Exception as e:
+        print(f"[FX] No se pudo guardar el snapshot: {e}")
+
+
+def cargar_snapshot():
+    """
+    Pone en memoria el último snapshot de la BD.
+    Devuelve su edad en segundos, o None si no hay ninguno utilizable.
+    """
+    if _app is None:
+        return None
+    try:
+        with _app.app_context():
+            FxSnapshot = _app.FxSnapshot
+            snap = FxSnapshot.query.order_by(FxSnapshot.obtenida_en.desc()).first()
+            if snap is None:
+                return None
+            tabla = json.loads(snap.tasas)
+            proveedor = snap.proveedor
+            obtenida_en = _a_timestamp(snap.obtenida_en)
+    except Exception as e:
+        print(f"[FX] No se pudo leer el snapshot: {e}")
+        return None
+
+    edad = time.time() - obtenida_en
+    if edad > FX_MAX_STALE:
+        return None
+    _guardar_tabla(tabla, proveedor, ahora=obtenida_en)
+    return edad
+
+
+def historial_tasas(moneda, dias=30):
+    """[(fecha, tasa), ...] de `moneda` según los snapshots guardados."""
+    if _app is None:
+        return []
+    moneda = (moneda or "").upper()
+    desde = datetime.utcnow() - timedelta(days=dias)
+    with _app.app_context():
+        FxSnapshot = _app.FxSnapshot
+        snaps = (
+            FxSnapshot.query
+            .filter(FxSnapshot.obtenida_en >= desde)
+            .order_by(FxSnapshot.obtenida_en)
+            .all()
+        )
+        salida = []
+        for snap in snaps:
+            tasa = json.loads(snap.tasas).get(moneda)
+            if tasa is not None:
+                salida.append((snap.obtenida_en, float(tasa)))
+        return salida
+
+
+def _descargar_y_guardar(moneda=None):
+    tabla, proveedor = descargar_tabla(moneda)
+    if not tabla:
+        return False
+    ahora = time.time()
+    _guardar_tabla(tabla, proveedor, ahora=ahora)
+    guardar_snapshot(tabla, proveedor, obtenida_en=ahora)
+    return True
+
+
+def _una_vez(moneda, funcion):
+    """
+    Ejecuta `funcion()` (una descarga de `moneda`) salvo que ya haya otra en
+    curso para la misma moneda: en ese caso espera su resultado, como mucho
+    FX_DEADLINE segundos. Descargas de monedas distintas no se bloquean.
+    """
+    with _descarga_lock:
+        item = _descargas.get(moneda)
+        lider = item is None
+        if lider:
+            item = _descargas[moneda] = {"listo": threading.Event(), "ok": False}
+
+    if not lider:
+        item["listo"].wait(FX_DEADLINE)
+        return item["ok"]
+
+    try:
+        item["ok"] = bool(funcion())
+        return item["ok"]
+    finally:
+        with _descarga_lock:
+            _descargas.pop(moneda, None)
+        item["listo"].set()
+
+
+# =========================
+# Refresco en segundo plano
+# =========================
+
+_refresco_lock = threading.Lock()
+_refresco_pid = None
+_revalidando = threading.Lock()
+
+
+def refrescar(monedas=None):
+    """
+    Renueva las tasas. Si otro proceso ya guardó un snapshot reciente se
+    usa ese; si no, se descarga la tabla USD. Si la tabla no trae alguna
+    de `monedas` (p. ej. frankfurter no tiene ARS), se pide aparte.
+    Devuelve True si se obtuvo al menos una tabla.
+    """
+    monedas = monedas or FX_MONEDAS
+    obtenida = False
+    edad = cargar_snapshot()
+    if edad is not None and edad <= FX_REFRESCO_INTERVALO:
+        obtenida = True
+    elif _una_vez(None, _descargar_y_guardar):
+        obtenida = True
+
+    for moneda in monedas:
+        if moneda == "USD":
+            continue
+        item = _tasa_en_cache(moneda)
+        if item is not None and item[1] <= FX_CACHE_TTL:
+            continue
+        if _una_vez(moneda, lambda m=moneda: _descargar_y_guardar(m)):
+            obtenida = True
+    return obtenida
+
+
+def _bucle_refresco():
+    if any(_tasa_en_cache(m) for m in FX_MONEDAS if m != "USD"):
+        # Ya hay tasas del snapshot: no hace falta salir todos juntos
+        time.sleep(random.uniform(0, FX_REFRESCO_JITTER))
+    while True:
+        try:
+            ok = refrescar()
+        except Exception as e:
+            print(f"[FX] Error en refresco: {e}")
+            ok = False
+        # Si falló, reintentar antes
+        time.sleep(FX_REFRESCO_INTERVALO if ok else min(FX_REFRESCO_INTERVALO, 60))
+
+
+def init_app(app):
+    """Carga el último snapshot de la BD y arranca el refresco."""
+    global _app
+    _app = app
+    cargar_snapshot()
+    iniciar_refresco()
+
+
+def iniciar_refresco():
+    """Arranca (una vez por proceso) el hilo que mantiene las tasas al día."""
+    global _refresco_pid
+    if not FX_REFRESCO:
+        return
+    with _refresco_lock:
+        if _refresco_pid == os.getpid():
+            return
+        _refresco_pid = os.getpid()
+        threading.Thread(target=_bucle_refresco, name="fx-refresco", daemon=True).start()
+
+
+def _revalidar_en_segundo_plano():
+    """Renueva la tabla sin bloquear el request (un solo refresco a la vez)."""
+    if not _revalidando.acquire(blocking=False):
+        return
+
+    def tarea():
+        try:
+            refrescar()
+        except Exception as e:
+            print(f"[FX] Error en revalidación: {e}")
+        finally:
+            _revalidando.release()
+
+    threading.Thread(target=tarea, name="fx-revalidar", daemon=True).start()
+
+
+def obtener_tasa_detalle(moneda: str):
+    """
+    Devuelve (tasa USD->moneda, obtenida_en, error); obtenida_en es el
+    timestamp de la tabla de origen (None para USD).
+    Una tasa vencida se sigue sirviendo mientras se renueva en segundo
+    plano; solo se va a la red en el request si no hay ninguna utilizable.
+    Una moneda que no está en FX_MONEDAS ni en ninguna tabla descargada se
+    rechaza sin red, y un fallo se recuerda FX_FALLO_TTL segundos.
+    """
+    moneda = (moneda or "").strip().upper()
+    if len(moneda) != 3 or not moneda.isalpha():
+        return None, None, "Moneda inválida."
+    if moneda == "USD":
+        return 1.0, None, None
+    if not _moneda_conocida(moneda):
+        return None, None, "Moneda inválida."
+
+    if _refresco_pid != os.getpid():
+        # Proceso nuevo (fork de gunicorn): el hilo no se hereda
+        iniciar_refresco()
+
+    item = _tasa_en_cache(moneda)
+    if item is not None:
+        tasa, edad, obtenida_en = item
+        if edad > FX_CACHE_TTL:
+            _revalidar_en_segundo_plano()
+        return tasa, obtenida_en, None
+
+    if _fallo_reciente(moneda):
+        return None, None, ERROR_PROVEEDORES
+
+    def buscar():
+        # Otro proceso pudo haberla renovado: snapshot antes que la red
+        if cargar_snapshot() is not None and _tasa_en_cache(moneda) is not None:
+            return True
+        return _descargar_y_guardar(moneda)
+
+    _una_vez(moneda, buscar)
+    item = _tasa_en_cache(moneda)
+    if item is None:
+        _registrar_fallo(moneda)
+        return None, None, ERROR_PROVEEDORES
+    return item[0], item[2], None
+
+
+def obtener_tasa(moneda: str):
+    """Devuelve (tasa USD->moneda, error)."""
+    tasa, _, error = obtener_tasa_detalle(moneda)
+    return tasa, error
+
+
+def convertir_desde_usd(amount: float, to: str):
+    """Convierte `amount` USD a la moneda `to`. Devuelve (monto, error)."""
+    tasa, error = obtener_tasa(to)
+    if error:
+        return None, error
+    return float(amount) * tasa, None
+
+
+def precios_en_moneda(cursos, moneda):
+    """
+    Convierte el precio de todos los `cursos` con una sola búsqueda de tasa.
+    Devuelve ({course_id: precio convertido}, error); ({}, None) si no se
+    pidió moneda o es USD.
+    """
+    moneda = (moneda or "").strip().upper()
+    if not moneda or moneda == "USD":
+        return {}, None
+    tasa, error = obtener_tasa(moneda)
+    if error:
+        return {}, error
+    return {c.id: (c.precio or 0) * tasa for c in cursos}, None
+
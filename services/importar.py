@@ -0,0 +1,223 @@
+# services/importar.py
+"""
+Importación de inscripciones y notas de un curso desde un CSV.
+
+El archivo se lee en streaming (nunca entero en memoria) y se procesa de
+a IMPORTAR_LOTE filas. Por lote:
+
+ - los usernames se resuelven a User.id con una sola consulta;
+ - las inscripciones existentes del curso para esos alumnos, con otra;
+ - las nuevas se insertan con un INSERT en lote (executemany) y las que
+   cambian con un UPDATE en lote por clave primaria, más un ajuste de
+   las tablas resumen.
+
+Todo el archivo va en una sola transacción. Con `simular` se calcula el
+mismo informe (altas, cambios, sin cambios, errores) y se descarta.
+
+Columnas, por nombre en la primera fila: username (obligatoria), status y
+nota (opcionales; la columna que no está no se toca). Las demás se
+ignoran, así que un CSV exportado (services/exportar.py) se puede editar
+y volver a importar. Separador "," o ";". Una celda vacía de status deja
+el estado (o "pendiente" si la inscripción es nueva); una de nota la borra.
+"""
+
+import csv
+import io
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+from flask import current_app
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+
+from stats import resumen
+
+from .calificaciones import leer_nota, leer_status
+
+
+# Filas por lote (consultas de usernames/inscripciones y sentencias en lote);
+# como _LOTE_IDS en calificaciones, por el límite de parámetros de SQLite
+IMPORTAR_LOTE = int(os.getenv("IMPORTAR_LOTE") or 500)
+# Ejemplos de cada tipo que se guardan para el informe
+IMPORTAR_MUESTRA = int(os.getenv("IMPORTAR_MUESTRA") or 200)
+
+
+class ArchivoInvalido(Exception):
+    """El archivo no se puede leer como CSV de inscripciones."""
+
+
+def _celda(valor):
+    # Deshace el ' que agrega la exportación delante de = + - @
+    valor = (valor or "").strip()
+    if len(valor) > 1 and valor[0] == "'" and valor[1] in "=+-@":
+        return valor[1:]
+    return valor
+
+
+def leer_csv(archivo):
+    """
+    Genera (número de línea, {columna: valor}) a partir de un archivo
+    binario, sin leerlo entero. Lanza ArchivoInvalido si falta la columna
+    username o el archivo no es UTF-8.
+    """
+    texto = io.TextIOWrapper(archivo, encoding="utf-8-sig", newline="")
+    try:
+        encabezado = texto.readline()
+        if not encabezado.strip():
+            raise ArchivoInvalido("El archivo está vacío.")
+        separador = ";" if encabezado.count(";") > encabezado.count(",") else ","
+        columnas = [c.strip().lower() for c in next(csv.reader([encabezado], delimiter=separador))]
+        if "username" not in columnas:
+            raise ArchivoInvalido("Falta la columna username.")
+
+        lector = csv.reader(texto, delimiter=separador)
+        for fila in lector:
+            if not any(c.strip() for c in fila):
+                continue
+            yield lector.line_num + 1, dict(zip(columnas, fila))
+    except UnicodeDecodeError:
+        raise ArchivoInvalido("El archivo tiene que estar en UTF-8.") from None
+    finally:
+        texto.detach()
+
+
+def _lotes(filas, tam):
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tam:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def importar(course_id, archivo, simular=False, atomico=False):
+    """
+    Importa el CSV `archivo` (binario) en las inscripciones de `course_id`.
+    Con `simular` o con `atomico` y algún error no queda nada aplicado.
+    Devuelve el informe: totales por tipo, y hasta IMPORTAR_MUESTRA
+    ejemplos de cada uno en "detalle" y "errores".
+    """
+    app = current_app
+    db, Enrollment, User = app.db, app.Enrollment, app.User
+
+    informe = {
+        "filas": 0, "altas": 0, "cambios": 0, "sin_cambios": 0, "cant_errores": 0,
+        "detalle": [], "errores": [], "simulado": simular, "aplicado": False,
+    }
+    ahora = datetime.utcnow()
+    vistos = set()              # user_id ya importados (filas repetidas)
+
+    def error(linea, username, mensaje):
+        informe["cant_errores"] += 1
+        if len(informe["errores"]) < IMPORTAR_MUESTRA:
+            informe["errores"].append({"linea": linea, "username": username, "error": mensaje})
+
+    def detalle(linea, username, tipo, antes, despues):
+        if len(informe["detalle"]) < IMPORTAR_MUESTRA:
+            informe["detalle"].append({
+                "linea": linea, "username": username, "tipo": tipo,
+                "antes": antes, "despues": despues,
+            })
+
+    try:
+        for lote in _lotes(leer_csv(archivo), IMPORTAR_LOTE):
+            informe["filas"] += len(lote)
+
+            validas = []
+            for linea, fila in lote:
+                username = _celda(fila.get("username"))
+                if not username:
+                    error(linea, "", "Falta el username.")
+                    continue
+                try:
+                    status = leer_status(_celda(fila["status"])) if "status" in fila else None
+                    nota = leer_nota(_celda(fila["nota"])) if "nota" in fila else None
+                except ValueError as e:
+                    error(linea, username, str(e))
+                    continue
+                validas.append((linea, username, status, "nota" in fila, nota))
+            if not validas:
+                continue
+
+            usuarios = {
+                u.username: u
+                for u in db.session.query(User.id, User.username, User.role)
+                .filter(User.username.in_({v[1] for v in validas}))
+            }
+            actuales = {
+                e.user_id: e
+                for e in db.session.query(
+                    Enrollment.id, Enrollment.user_id, Enrollment.status, Enrollment.nota
+                )
+                .filter(
+                    Enrollment.course_id == course_id,
+                    Enrollment.user_id.in_([u.id for u in usuarios.values()]),
+                )
+                .with_for_update()
+            }
+
+            altas, cambios, cambios_resumen = [], [], []
+            for linea, username, status, con_nota, nota in validas:
+                usuario = usuarios.get(username)
+                if usuario is None:
+                    error(linea, username, "No existe el usuario.")
+                    continue
+                if usuario.role != "estudiante":
+                    error(linea, username, f"No es estudiante ({usuario.role}).")
+                    continue
+                if usuario.id in vistos:
+                    error(linea, username, "Alumno repetido en el archivo.")
+                    continue
+                vistos.add(usuario.id)
+
+                actual = actuales.get(usuario.id)
+                if actual is None:
+                    nueva = {
+                        "user_id": usuario.id, "course_id": course_id,
+                        "status": status or "pendiente", "nota": nota, "created_at": ahora,
+                    }
+                    altas.append(nueva)
+                    informe["altas"] += 1
+                    detalle(linea, username, "alta", None, (nueva["status"], nota))
+                    continue
+
+                antes = (actual.status, actual.nota)
+                despues = (status or actual.status, nota if con_nota else actual.nota)
+                if despues == antes:
+                    informe["sin_cambios"] += 1
+                    continue
+                cambios.append({"id": actual.id, "status": despues[0], "nota": despues[1]})
+                cambios_resumen.append((course_id, usuario.id, antes, despues))
+                informe["cambios"] += 1
+                detalle(linea, username, "cambio", antes, despues)
+
+            if simular:
+                continue
+            if altas:
+                db.session.execute(insert(Enrollment), altas)
+                resumen.registrar_altas([SimpleNamespace(**a) for a in altas])
+            if cambios:
+                db.session.execute(update(Enrollment), cambios)
+                resumen.registrar_cambios(cambios_resumen)
+
+        informe["errores"].sort(key=lambda e: e["linea"])
+        if simular or (atomico and informe["cant_errores"]):
+            db.session.rollback()
+        else:
+            db.session.commit()
+            informe["aplicado"] = True
+    except IntegrityError:
+        # Alguien se inscribió al curso mientras se importaba
+        db.session.rollback()
+        raise ArchivoInvalido(
+            "Otra operación modificó las inscripciones del curso durante la importación. "
+            "Volvé a intentarlo."
+        ) from None
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return informe
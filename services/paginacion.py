@@ -0,0 +1,213 @@
+# services/paginacion.py
+"""
+Paginación por clave (keyset / seek) para los listados.
+
+En vez de OFFSET (que recorre y descarta todas las filas anteriores), cada
+página pide `WHERE (orden) > (última fila vista) ORDER BY orden LIMIT n`:
+con un índice sobre las columnas de orden cuesta lo mismo la página 1 que
+la 500. El orden tiene que ser total, así que la última columna es
+siempre la clave primaria (p. ej. (nombre, id)).
+
+La posición viaja en la URL como un cursor opaco: `?despues=...` para la
+página siguiente y `?antes=...` para la anterior. `?por_pagina=N` cambia
+el tamaño (hasta PAGINA_MAX).
+
+El total que se muestra es aproximado: en PostgreSQL sale de las
+estadísticas del planificador (pg_class.reltuples, sin recorrer la tabla)
+y en los demás motores es un COUNT(*) guardado en memoria unos segundos.
+"""
+
+import base64
+import json
+import os
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import request, url_for
+from sqlalchemy import Date, DateTime, func, literal, select, text, tuple_
+
+
+# Filas por página por defecto y máximo que se acepta en ?por_pagina
+PAGINA_TAM = int(os.getenv("PAGINA_TAM") or 24)
+PAGINA_MAX = int(os.getenv("PAGINA_MAX") or 100)
+# Segundos que se reutiliza un COUNT(*) (motores sin estadísticas baratas)
+PAGINA_CONTEO_TTL = float(os.getenv("PAGINA_CONTEO_TTL") or 60)
+
+_conteos = {}           # tabla -> (total, momento)
+_conteos_lock = threading.Lock()
+
+
+class Pagina:
+    """Una página de resultados y los cursores para moverse."""
+
+    def __init__(self, items, tam, siguiente=None, anterior=None, total=None):
+        self.items = items
+        self.tam = tam
+        self.siguiente = siguiente      # cursor de la página siguiente (o None)
+        self.anterior = anterior        # cursor de la página anterior (o None)
+        self.total = total              # total aproximado (o None)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def url(self, **cursor):
+        """URL del mismo endpoint con el cursor dado y los demás parámetros (moneda, ...)."""
+        args = {k: v for k, v in request.args.items() if k not in ("despues", "antes")}
+        args.update({k: v for k, v in cursor.items() if v is not None})
+        return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+
+# =========================
+# Cursores
+# =========================
+
+def _codificar(valores):
+    crudo = json.dumps(
+        valores, separators=(",", ":"),
+        default=lambda v: v.isoformat() if isinstance(v, (date, datetime)) else str(v),
+    ).encode()
+    return base64.urlsafe_b64encode(crudo).rstrip(b"=").decode()
+
+
+def _tipo_valido(valor, columna):
+    """True si `valor` (ya convertido) sirve como parámetro de `columna`."""
+    if valor is None:
+        return True
+    try:
+        tipo = columna.type.python_type
+    except NotImplementedError:
+        return True
+    if isinstance(valor, bool):
+        return tipo is bool
+    if tipo in (float, Decimal):
+        return isinstance(valor, (int, float))
+    return isinstance(valor, tipo)
+
+
+def _decodificar(cursor, orden):
+    """
+    Valores del cursor como parámetros tipados según las columnas de
+    `orden`, o None si falta o no es válido (se va a la primera página).
+    Un valor que no es del tipo de su columna (cursor alterado) también
+    invalida el cursor, para que no llegue a la BD.
+    """
+    if not cursor:
+        return None
+    try:
+        crudo = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        valores = json.loads(crudo)
+        if not isinstance(valores, list) or len(valores) != len(orden):
+            return None
+        salida = []
+        for valor, columna in zip(valores, orden):
+            if isinstance(valor, str) and isinstance(columna.type, DateTime):
+                valor = datetime.fromisoformat(valor)
+            elif isinstance(valor, str) and isinstance(columna.type, Date):
+                valor = date.fromisoformat(valor)
+            if not _tipo_valido(valor, columna):
+                return None
+            salida.append(literal(valor, columna.type))
+    except ValueError:
+        return None
+    return salida
+
+
+def tam_pagina():
+    """Tamaño pedido en ?por_pagina, acotado a [1, PAGINA_MAX]."""
+    try:
+        tam = int(request.args.get("por_pagina") or PAGINA_TAM)
+    except ValueError:
+        tam = PAGINA_TAM
+    return max(1, min(tam, PAGINA_MAX))
+
+
+# =========================
+# API
+# =========================
+
+def paginar(query, orden, tam=None, total=None, descendente=False, clave=None):
+    """
+    Página de `query` (un Model.query / db.session.query) ordenada por las
+    columnas de `orden`, todas ascendentes (o todas descendentes); la
+    combinación tiene que ser única (terminar en una PK).
+    `clave(fila)` devuelve los valores de `orden` de una fila; por defecto
+    los atributos del mismo nombre, del modelo o de la entidad que le
+    corresponde en filas de varias (db.session.query(Enrollment, User)).
+    Lee el cursor y el tamaño de la request actual.
+    """
+    tam = tam or tam_pagina()
+    antes = _decodificar(request.args.get("antes"), orden)
+    despues = None if antes else _decodificar(request.args.get("despues"), orden)
+
+    fila_orden = tuple_(*orden)
+
+    def pasado(valores, invertido):
+        """Filas que vienen después de `valores` en el orden (o antes, si invertido)."""
+        if descendente != invertido:
+            return fila_orden < tuple_(*valores)
+        return fila_orden > tuple_(*valores)
+
+    def ordenar(q, invertido):
+        bajar = descendente != invertido
+        return q.order_by(*(c.desc() if bajar else c.asc() for c in orden))
+
+    if antes is not None:
+        # Hacia atrás: orden invertido y se da vuelta el resultado
+        previas = query.filter(pasado(antes, invertido=True))
+        filas = ordenar(previas, invertido=True).limit(tam + 1).all()
+        hay_mas_atras = len(filas) > tam
+        filas = filas[:tam][::-1]
+        hay_mas_adelante = True
+    else:
+        if despues is not None:
+            query = query.filter(pasado(despues, invertido=False))
+        filas = ordenar(query, invertido=False).limit(tam + 1).all()
+        hay_mas_adelante = len(filas) > tam
+        filas = filas[:tam]
+        hay_mas_atras = despues is not None
+
+    if clave is None:
+        def clave(fila):
+            return [getattr(getattr(fila, c.class_.__name__, fila), c.key) for c in orden]
+
+    def cursor(fila):
+        return _codificar(list(clave(fila)))
+
+    return Pagina(
+        filas,
+        tam,
+        siguiente=cursor(filas[-1]) if filas and hay_mas_adelante else None,
+        anterior=cursor(filas[0]) if filas and hay_mas_atras else None,
+        total=total,
+    )
+
+
+def total_aproximado(db, modelo):
+    """Cantidad aproximada de filas de la tabla de `modelo`."""
+    tabla = modelo.__table__
+
+    if db.engine.dialect.name == "postgresql":
+        nombre = db.engine.dialect.identifier_preparer.quote(tabla.name)   # "user" es reservada
+        estimado = db.session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:t)"),
+            {"t": nombre},
+        ).scalar()
+        # -1 (o nada) = tabla nunca analizada: se cuenta
+        if estimado is not None and estimado >= 0:
+            return estimado
+
+    ahora = time.monotonic()
+    with _conteos_lock:
+        guardado = _conteos.get(tabla.name)
+    if guardado and ahora - guardado[1] < PAGINA_CONTEO_TTL:
+        return guardado[0]
+
+    total = db.session.execute(select(func.count()).select_from(tabla)).scalar() or 0
+    with _conteos_lock:
+        _conteos[tabla.name] = (total, ahora)
+    return total
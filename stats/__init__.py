@@ -4,4 +4,7 @@ from flask import Blueprint
 stats_bp = Blueprint("stats", __name__)
 
 # Импортируем маршруты, чтобы они «повесились» на stats_bp
-from . import routes  # noqa: E402,F401
\ No newline at end of file
+from . import routes  # noqa: E402,F401
+from . import resumen  # noqa: E402,F401
+from .resumen import marcar_datos_modificados  # noqa: E402,F401
+from . import precalentar  # noqa: E402,F401
@@ -0,0 +1,134 @@
+# stats/precalentar.py
+"""
+Precalentado de la caché de gráficos.
+
+`flask stats warm` renderiza los gráficos globales del admin, los de cada
+profesor con cursos (alcance Course.teacher_id) y, con --estudiantes, los
+de cada estudiante con inscripciones, y los deja en la caché en disco que
+comparten los workers. Así el primer acceso después de un deploy ya no
+paga el render en frío.
+
+Con --intervalo N queda corriendo y vuelve a precalentar cada vez que
+cambia la versión de datos (pensado para un proceso aparte, no para los
+workers web).
+"""
+
+import os
+import time
+
+import click
+from flask import current_app
+
+from . import stats_bp
+from . import render
+from .routes import (
+    FORMATOS,
+    GRAFICOS_ADMIN,
+    GRAFICOS_ESTUDIANTE,
+    _grafico_cacheado,
+    _ruta_disco,
+    _version_datos,
+)
+
+
+def alcances(estudiantes=False):
+    """[(rol, uid, registro de gráficos)] a precalentar."""
+    app = current_app
+    db, User, Course, Enrollment = app.db, app.User, app.Course, app.Enrollment
+
+    salida = [("admin", None, GRAFICOS_ADMIN)]
+
+    profesores = (
+        db.session.query(Course.teacher_id)
+        .join(User, User.id == Course.teacher_id)
+        .filter(User.role == "profesor")
+        .distinct()
+        .order_by(Course.teacher_id)
+    )
+    salida += [("profesor", tid, GRAFICOS_ADMIN) for (tid,) in profesores]
+
+    if estudiantes:
+        activos = (
+            db.session.query(Enrollment.user_id)
+            .join(User, User.id == Enrollment.user_id)
+            .filter(User.role == "estudiante")
+            .distinct()
+            .order_by(Enrollment.user_id)
+        )
+        salida += [("estudiante", uid, GRAFICOS_ESTUDIANTE) for (uid,) in activos]
+
+    return salida
+
+
+def calentar(estudiantes=False, formatos=("png",), informar=None):
+    """
+    Deja en caché todos los gráficos de `alcances()` para la versión de
+    datos actual de cada alcance. Devuelve [(nombre, rol, uid, formato, segundos, estado)],
+    con estado "renderizado", "en caché" o el error.
+    `informar`, si se pasa, se llama con cada resultado a medida que sale.
+    """
+    resultados = []
+
+    for rol, uid, graficos in alcances(estudiantes):
+        version, _ = _version_datos(rol, uid)
+        for nombre, construir in graficos.items():
+            for formato in formatos:
+                _, archivo = _ruta_disco(nombre, rol, uid, version, formato)
+                estado = "en caché" if os.path.exists(archivo) else "renderizado"
+
+                inicio = time.perf_counter()
+                try:
+                    _grafico_cacheado(nombre, rol, uid, construir, version=version, formato=formato)
+                except render.RenderNoDisponible as e:
+                    estado = f"error: {e}"
+                segundos = time.perf_counter() - inicio
+
+                resultado = (nombre, rol, uid, formato, segundos, estado)
+                resultados.append(resultado)
+                if informar is not None:
+                    informar(resultado)
+
+    # Las consultas quedan fuera de cualquier request: no dejar la
+    # transacción abierta entre pasadas
+    current_app.db.session.remove()
+    return resultados
+
+
+def _imprimir(resultado):
+    nombre, rol, uid, formato, segundos, estado = resultado
+    alcance = rol if uid is None else f"{rol} {uid}"
+    click.echo(f"  {nombre + '.' + formato:<28} {alcance:<16} {segundos * 1000:8.1f} ms  {estado}")
+
+
+@stats_bp.cli.command("warm")
+@click.option("--estudiantes", is_flag=True, help="Incluir a cada estudiante con inscripciones.")
+@click.option(
+    "--formato", "formatos", multiple=True, type=click.Choice(sorted(FORMATOS)),
+    default=("png", "svg"), show_default=True, help="Formatos a generar (repetible).",
+)
+@click.option(
+    "--intervalo", type=float, default=0, show_default=True,
+    help="Segundos entre revisiones de la versión de datos (0 = una sola pasada).",
+)
+def warm_command(estudiantes, formatos, intervalo):
+    """Renderiza los gráficos de estadísticas y los deja en la caché."""
+    ultima = None
+    while True:
+        version, _ = _version_datos()
+        if version != ultima:
+            click.echo(f"Precalentando gráficos (versión de datos {version})...")
+            inicio = time.perf_counter()
+            resultados = calentar(estudiantes, formatos, informar=_imprimir)
+            renderizados = sum(1 for r in resultados if r[5] == "renderizado")
+            errores = sum(1 for r in resultados if r[5].startswith("error"))
+            click.echo(
+                f"{len(resultados)} gráficos ({renderizados} renderizados, "
+                f"{errores} con error) en {time.perf_counter() - inicio:.2f} s."
+            )
+            ultima = version
+        else:
+            current_app.db.session.remove()
+
+        if intervalo <= 0:
+            break
+        time.sleep(intervalo)
@@ -0,0 +1,200 @@
+# stats/render.py
+"""
+Render de gráficos con matplotlib fuera de los workers web.
+
+Las funciones de gráfico reciben datos planos (listas, strings) y
+devuelven los bytes del PNG, así pueden correr en un ProcessPoolExecutor
+acotado: el estado global de pyplot y su memoria quedan en los procesos
+de render y el worker web solo espera el resultado (con timeout).
+
+matplotlib se importa recién al dibujar el primer gráfico (normalmente
+dentro del proceso de render): importar este módulo no lo carga, así el
+arranque de los workers web no paga su costo.
+"""
+
+import io
+import multiprocessing
+import os
+import textwrap
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+
+# Procesos de render (0 = renderizar dentro del worker web).
+STATS_RENDER_PROCESOS = int(os.getenv("STATS_RENDER_PROCESOS") or 2)
+# Máximo de gráficos en cola o en curso por worker web.
+STATS_RENDER_COLA = int(os.getenv("STATS_RENDER_COLA") or 8)
+# Segundos máximos de espera por un gráfico.
+STATS_RENDER_TIMEOUT = float(os.getenv("STATS_RENDER_TIMEOUT") or 20)
+
+
+_SIN_MATPLOTLIB = "matplotlib no está instalado (usar ?format=svg)"
+
+
+class RenderNoDisponible(Exception):
+    """La cola de render está llena, el gráfico tardó demasiado o falta matplotlib."""
+
+
+# =========================
+# Gráficos (corren en el proceso de render)
+# =========================
+
+_plt = None
+
+
+def _pyplot():
+    """matplotlib.pyplot con backend Agg, importado en el primer uso."""
+    global _plt
+    if _plt is None:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        _plt = plt
+    return _plt
+
+
+def _fig_to_png(fig):
+    plt = _pyplot()
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight")
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def sin_datos(msg="Sin datos"):
+    plt = _pyplot()
+    fig, ax = plt.subplots()
+    ax.text(0.5, 0.5, msg, ha="center", va="center")
+    ax.axis("off")
+    return _fig_to_png(fig)
+
+
+def barras(etiquetas, valores, titulo, ylabel, xlabel,
+           figsize=(9, 4), paleta="Set3", ylim=None, envolver=True, rotacion=20):
+    if envolver:
+        etiquetas = [textwrap.fill(str(e), width=18) for e in etiquetas]
+
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=figsize)
+    x = range(len(valores))
+    colors = getattr(plt.cm, paleta)(range(len(valores)))
+
+    ax.bar(x, valores, color=colors)
+    ax.set_xticks(x)
+    if rotacion:
+        ax.set_xticklabels(etiquetas, rotation=rotacion, ha="right")
+    else:
+        ax.set_xticklabels(etiquetas)
+
+    ax.set_title(titulo)
+    ax.set_ylabel(ylabel)
+    ax.set_xlabel(xlabel)
+    if ylim is not None:
+        ax.set_ylim(*ylim)
+    ax.grid(axis="y", linestyle="--", alpha=0.3)
+
+    fig.tight_layout()
+    return _fig_to_png(fig)
+
+
+def lineas(x, y, titulo, ylabel, xlabel, figsize=(9, 4)):
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=figsize)
+    ax.plot(x, y, marker="o")
+
+    ax.set_title(titulo)
+    ax.set_ylabel(ylabel)
+    ax.set_xlabel(xlabel)
+    ax.grid(True, linestyle="--", alpha=0.3)
+    fig.autofmt_xdate()
+
+    fig.tight_layout()
+    return _fig_to_png(fig)
+
+
+GRAFICOS = {
+    "sin_datos": sin_datos,
+    "barras": barras,
+    "lineas": lineas,
+}
+
+
+def _ejecutar(tipo, kwargs):
+    return GRAFICOS[tipo](**kwargs)
+
+
+# =========================
+# Pool de procesos (lado web)
+# =========================
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_cola = threading.BoundedSemaphore(STATS_RENDER_COLA)
+
+
+def _obtener_pool():
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # "spawn": los procesos de render no heredan las conexiones a la
+            # BD ni los hilos del worker web. Sí vuelven a importar el script
+            # principal (app.py con `python app.py`), que por eso no inicializa
+            # nada cuando se importa como __mp_main__.
+            _pool = ProcessPoolExecutor(
+                max_workers=STATS_RENDER_PROCESOS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _descartar_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def renderizar(tipo, **kwargs):
+    """
+    PNG del gráfico `tipo` con los datos de `kwargs`.
+    Lanza RenderNoDisponible si la cola está llena, se supera el timeout o
+    matplotlib no está instalado (es opcional: ?format=svg no lo necesita).
+    """
+    if STATS_RENDER_PROCESOS <= 0:
+        try:
+            return _ejecutar(tipo, kwargs)
+        except ImportError:
+            raise RenderNoDisponible(_SIN_MATPLOTLIB) from None
+
+    if not _cola.acquire(blocking=False):
+        raise RenderNoDisponible("Cola de render llena")
+    try:
+        futuro = _obtener_pool().submit(_ejecutar, tipo, kwargs)
+    except BrokenProcessPool:
+        _cola.release()
+        _descartar_pool()
+        raise RenderNoDisponible("Proceso de render caído")
+    except BaseException:
+        _cola.release()
+        raise
+    # El lugar en la cola se libera cuando el render termina de verdad (o
+    # se cancela), no al vencer el timeout: cancel() no frena una tarea
+    # que ya está corriendo en el proceso.
+    futuro.add_done_callback(lambda _: _cola.release())
+
+    try:
+        return futuro.result(timeout=STATS_RENDER_TIMEOUT)
+    except FuturesTimeout:
+        futuro.cancel()
+        raise RenderNoDisponible("El gráfico tardó demasiado")
+    except ImportError:
+        raise RenderNoDisponible(_SIN_MATPLOTLIB) from None
+    except BrokenProcessPool:
+        # Un proceso de render murió (p. ej. OOM): se recrea el pool
+        _descartar_pool()
+        raise RenderNoDisponible("Proceso de render caído")
@@ -0,0 +1,246 @@
+# stats/resumen.py
+"""
+Tablas resumen de estadísticas, mantenidas en cada escritura de Enrollment.
+
+ - StatsCurso:            inscripciones y suma/cantidad de notas por curso
+ - StatsCursoDia:         inscripciones por curso y día
+ - StatsEstudianteEstado: inscripciones por estudiante y estado
+
+Siempre son una función de la tabla Enrollment: los gráficos las leen en
+O(cursos) u O(días) en lugar de agrupar todo el historial en cada request.
+`flask stats rebuild` las recalcula desde cero.
+
+Cada escritura sube además la versión (StatsVersionAlcance) de los cursos
+y estudiantes que toca, en el mismo upsert por fila: dos escrituras sobre
+cursos distintos no se bloquean y los gráficos de los demás alcances
+siguen en caché (ver _version_datos en stats/routes.py).
+"""
+
+from collections import Counter, defaultdict
+from datetime import datetime
+
+import click
+from flask import current_app
+from sqlalchemy import and_, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from . import stats_bp
+
+
+def _modelos():
+    app = current_app
+    return app.db, app.Enrollment, app.StatsCurso, app.StatsCursoDia, app.StatsEstudianteEstado
+
+
+def _incrementar(modelo, deltas, valores=None):
+    """
+    Suma `deltas` ({clave primaria (tupla): {columna: delta}}) a las filas
+    de `modelo`, creándolas si no existen, y les asigna `valores`
+    ({columna: valor}). En SQLite/PostgreSQL es un único
+    INSERT ... ON CONFLICT DO UPDATE (executemany). Las filas van en orden
+    de clave, para que dos transacciones tomen los locks en el mismo orden.
+    """
+    if not deltas:
+        return
+    db = current_app.db
+    tabla = modelo.__table__
+    pk = [c.name for c in tabla.primary_key.columns]
+    columnas = sorted({col for d in deltas.values() for col in d})
+    valores = valores or {}
+
+    filas = []
+    for clave, d in sorted(deltas.items()):
+        fila = dict(zip(pk, clave))
+        fila.update({col: d.get(col, 0) for col in columnas})
+        fila.update(valores)
+        filas.append(fila)
+
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto in ("sqlite", "postgresql"):
+        stmt = (sqlite_insert if dialecto == "sqlite" else pg_insert)(tabla)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=pk,
+            set_={
+                **{col: tabla.c[col] + stmt.excluded[col] for col in columnas},
+                **{col: stmt.excluded[col] for col in valores},
+            },
+        )
+        db.session.execute(stmt, filas)
+        return
+
+    for fila in filas:
+        cond = and_(*(tabla.c[k] == fila[k] for k in pk))
+        res = db.session.execute(
+            update(tabla).where(cond).values(
+                {**{col: tabla.c[col] + fila[col] for col in columnas}, **valores}
+            )
+        )
+        if res.rowcount == 0:
+            db.session.execute(insert(tabla).values(**fila))
+
+
+def marcar_datos_modificados(cursos=(), estudiantes=()):
+    """
+    Sube la versión de datos de los gráficos de `cursos` y `estudiantes`
+    (ids). No hace commit: va dentro de la misma transacción que la
+    escritura que la provoca, y solo bloquea las filas de esos alcances.
+    """
+    StatsVersionAlcance = current_app.StatsVersionAlcance
+    deltas = {("curso", i): {"version": 1} for i in cursos}
+    deltas.update({("estudiante", i): {"version": 1} for i in estudiantes})
+    _incrementar(StatsVersionAlcance, deltas, {"updated_at": datetime.utcnow()})
+
+
+def _nueva_epoca():
+    """Sube StatsVersion (id=1): invalida todos los gráficos. No hace commit."""
+    db = current_app.db
+    StatsVersion = current_app.StatsVersion
+    actualizadas = StatsVersion.query.filter_by(id=1).update(
+        {
+            StatsVersion.version: StatsVersion.version + 1,
+            StatsVersion.updated_at: datetime.utcnow(),
+        },
+        synchronize_session=False,
+    )
+    if not actualizadas:
+        db.session.add(StatsVersion(id=1, version=1, updated_at=datetime.utcnow()))
+
+
+def _aplicar(por_curso, por_dia, por_estado, estudiantes):
+    _, _, StatsCurso, StatsCursoDia, StatsEstudianteEstado = _modelos()
+    por_curso = {k: v for k, v in por_curso.items() if any(v.values())}
+    _incrementar(StatsCurso, por_curso)
+    _incrementar(StatsCursoDia, {k: {"cantidad": n} for k, n in por_dia.items() if n})
+    _incrementar(StatsEstudianteEstado, {k: {"cantidad": n} for k, n in por_estado.items() if n})
+    marcar_datos_modificados(cursos=[k[0] for k in por_curso], estudiantes=estudiantes)
+
+
+def _nuevo_delta():
+    return {"inscripciones": 0, "suma_notas": 0.0, "cant_notas": 0}
+
+
+def registrar_altas(inscripciones):
+    """
+    Suma a los resúmenes las inscripciones nuevas (objetos con course_id,
+    user_id, status, nota y created_at). No hace commit.
+    """
+    por_curso = defaultdict(_nuevo_delta)
+    por_dia = Counter()
+    por_estado = Counter()
+    estudiantes = set()
+
+    for e in inscripciones:
+        estudiantes.add(e.user_id)
+        d = por_curso[(e.course_id,)]
+        d["inscripciones"] += 1
+        if e.nota is not None:
+            d["suma_notas"] += e.nota
+            d["cant_notas"] += 1
+        fecha = (e.created_at or datetime.utcnow()).date()
+        por_dia[(e.course_id, fecha)] += 1
+        por_estado[(e.user_id, e.status or "pendiente")] += 1
+
+    _aplicar(por_curso, por_dia, por_estado, estudiantes)
+
+
+def registrar_bajas(inscripciones):
+    """Resta de los resúmenes inscripciones que se van a borrar. No hace commit."""
+    por_curso = defaultdict(_nuevo_delta)
+    por_dia = Counter()
+    por_estado = Counter()
+    estudiantes = set()
+
+    for e in inscripciones:
+        estudiantes.add(e.user_id)
+        d = por_curso[(e.course_id,)]
+        d["inscripciones"] -= 1
+        if e.nota is not None:
+            d["suma_notas"] -= e.nota
+            d["cant_notas"] -= 1
+        if e.created_at is not None:
+            por_dia[(e.course_id, e.created_at.date())] -= 1
+        por_estado[(e.user_id, e.status or "pendiente")] -= 1
+
+    _aplicar(por_curso, por_dia, por_estado, estudiantes)
+
+
+def registrar_cambios(cambios):
+    """
+    Aplica cambios de estado/nota. `cambios` es una lista de
+    (course_id, user_id, (status_antes, nota_antes), (status_despues, nota_despues)).
+    No hace commit.
+    """
+    por_curso = defaultdict(_nuevo_delta)
+    por_estado = Counter()
+    estudiantes = set()
+
+    for course_id, user_id, (status_antes, nota_antes), (status_despues, nota_despues) in cambios:
+        if (status_antes, nota_antes) != (status_despues, nota_despues):
+            estudiantes.add(user_id)
+        d = por_curso[(course_id,)]
+        if nota_antes is not None:
+            d["suma_notas"] -= nota_antes
+            d["cant_notas"] -= 1
+        if nota_despues is not None:
+            d["suma_notas"] += nota_despues
+            d["cant_notas"] += 1
+        if status_antes != status_despues:
+            por_estado[(user_id, status_antes)] -= 1
+            por_estado[(user_id, status_despues)] += 1
+
+    _aplicar(por_curso, Counter(), por_estado, estudiantes)
+
+
+def reconstruir():
+    """Recalcula las tres tablas resumen desde Enrollment (con commit)."""
+    db, Enrollment, StatsCurso, StatsCursoDia, StatsEstudianteEstado = _modelos()
+
+    db.session.execute(StatsCurso.__table__.delete())
+    db.session.execute(StatsCursoDia.__table__.delete())
+    db.session.execute(StatsEstudianteEstado.__table__.delete())
+
+    db.session.execute(
+        insert(StatsCurso.__table__).from_select(
+            ["course_id", "inscripciones", "suma_notas", "cant_notas"],
+            select(
+                Enrollment.course_id,
+                func.count(Enrollment.id),
+                func.coalesce(func.sum(Enrollment.nota), 0.0),
+                func.count(Enrollment.nota),
+            ).group_by(Enrollment.course_id),
+        )
+    )
+
+    fecha = func.date(Enrollment.created_at)
+    db.session.execute(
+        insert(StatsCursoDia.__table__).from_select(
+            ["course_id", "fecha", "cantidad"],
+            select(
+                Enrollment.course_id,
+                fecha,
+                func.count(Enrollment.id),
+            ).group_by(Enrollment.course_id, fecha),
+        )
+    )
+
+    db.session.execute(
+        insert(StatsEstudianteEstado.__table__).from_select(
+            ["user_id", "status", "cantidad"],
+            select(
+                Enrollment.user_id,
+                Enrollment.status,
+                func.count(Enrollment.id),
+            ).group_by(Enrollment.user_id, Enrollment.status),
+        )
+    )
+
+    _nueva_epoca()
+    db.session.commit()
+
+
+@stats_bp.cli.command("rebuild")
+def rebuild_command():
+    """Recalcula las tablas resumen de estadísticas desde Enrollment."""
+    reconstruir()
+    click.echo("Tablas resumen de estadísticas recalculadas.")
@@ -1,18 +1,27 @@
 # stats/routes.py
 
-import io
-import textwrap
-
-import matplotlib
-matplotlib.use("Agg")  
-import matplotlib.pyplot as plt
-import pandas as pd
-
-from flask import current_app, render_template, send_file
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+
+from flask import Response, current_app, jsonify, render_template, request
+from werkzeug.http import is_resource_modified
 from flask_login import login_required, current_user
 
 
 from . import stats_bp
+from . import render, svg
+
+
+# Caché de gráficos: memoria (por proceso) + disco (compartido entre workers).
+STATS_CACHE_MAX = int(os.getenv("STATS_CACHE_MAX") or 128)
+STATS_CACHE_DIR = os.getenv("STATS_CACHE_DIR")  # por defecto instance/stats_cache
+
+# Máximo de puntos del gráfico de actividad: si el rango no entra por día
+# se agrupa por semana, mes o año.
+STATS_ACTIVIDAD_MAX_PUNTOS = int(os.getenv("STATS_ACTIVIDAD_MAX_PUNTOS") or 120)
 
 
 # =========================
@@ -31,171 +40,482 @@ def _get_db_models():
     return db, Course, Enrollment
 
 
-def _fig_to_png(fig):
-    buf = io.BytesIO()
-    fig.savefig(buf, format="png", bbox_inches="tight")
-    plt.close(fig)
-    buf.seek(0)
-    return send_file(buf, mimetype="image/png")
+def _get_resumenes():
+    """Tablas resumen (ver stats/resumen.py)."""
+    app = current_app
+    return app.StatsCurso, app.StatsCursoDia, app.StatsEstudianteEstado
+
+
+# Formato -> (mimetype, módulo con renderizar(tipo, **kwargs)).
+# PNG (matplotlib, en el pool de procesos) es el formato por defecto;
+# ?format=svg usa stats/svg.py, que no necesita matplotlib.
+FORMATOS = {
+    "png": ("image/png", render),
+    "svg": ("image/svg+xml", svg),
+}
+
 
+def _formato_pedido():
+    formato = (request.args.get("format") or "png").lower()
+    return formato if formato in FORMATOS else "png"
 
-def _fig_sin_datos(msg="Sin datos"):
-    fig, ax = plt.subplots()
-    ax.text(0.5, 0.5, msg, ha="center", va="center")
-    ax.axis("off")
-    return _fig_to_png(fig)
+
+def _grafico(tipo, **kwargs):
+    """Descripción de un gráfico (tipo y datos), independiente del formato."""
+    return tipo, kwargs
 
 
 # =========================
-# ADMIN / PROFESOR  (gráficos)
+# Caché de gráficos
 # =========================
+#
+# Clave: (gráfico, rol, id de usuario del alcance, versión de datos, formato).
+# La versión es la del alcance (ver _version_datos): sale de la BD, así que
+# todos los workers ven la invalidación, y una escritura sobre un curso no
+# invalida los gráficos de los profesores y estudiantes que no lo ven.
+
+_cache_graficos = OrderedDict()
+_cache_graficos_lock = threading.Lock()
+
+
+def _version_datos(rol=None, uid=None):
+    """
+    (versión, fecha del último cambio) de los datos que ve un alcance:
+    admin -> todos los cursos, profesor -> sus cursos, estudiante -> lo
+    suyo; sin rol, todo. La versión resume la época (StatsVersion) y las
+    filas de StatsVersionAlcance del alcance (cantidad, suma y última
+    fecha), así que cambia con cualquier escritura que el alcance vea.
+    """
+    db = current_app.db
+    StatsVersion = current_app.StatsVersion
+    Alcance = current_app.StatsVersionAlcance
+    Course = current_app.Course
 
-@stats_bp.route("/admin/stats/inscripciones.png")
-@login_required
-def admin_inscripciones_png():
-    if not _solo_admin_o_profesor():
-        return "Acceso denegado", 403
+    epoca = (
+        db.session.query(StatsVersion.version, StatsVersion.updated_at)
+        .filter_by(id=1)
+        .first()
+    )
+
+    q = db.session.query(
+        db.func.count(),
+        db.func.coalesce(db.func.sum(Alcance.version), 0),
+        db.func.max(Alcance.updated_at),
+    )
+    if rol in ("admin", "profesor"):
+        q = q.filter(Alcance.alcance == "curso")
+        if rol == "profesor":
+            q = q.join(Course, Course.id == Alcance.id).filter(Course.teacher_id == uid)
+    elif rol == "estudiante":
+        q = q.filter(Alcance.alcance == "estudiante", Alcance.id == uid)
+    filas, suma, ultima = q.one()
+
+    fechas = [f for f in (ultima, epoca.updated_at if epoca else None) if f is not None]
+    clave = f"{epoca.version if epoca else 0}|{filas}|{suma}|{ultima}"
+    version = hashlib.sha1(clave.encode("utf-8")).hexdigest()[:16]
+    return version, max(fechas) if fechas else None
+
+
+def _dir_cache():
+    path = STATS_CACHE_DIR or os.path.join(current_app.instance_path, "stats_cache")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _nombre_archivo(nombre, rol, uid):
+    return f"{nombre}-{rol}-{uid if uid is not None else 'all'}"
+
+
+def _ruta_disco(nombre, rol, uid, version, formato):
+    """
+    (carpeta, archivo) en disco. Cada gráfico y alcance tiene su carpeta
+    con un archivo por versión y formato, así limpiar versiones viejas lista
+    unos pocos archivos y no toda la caché.
+    """
+    carpeta = os.path.join(_dir_cache(), _nombre_archivo(nombre, rol, uid))
+    return carpeta, os.path.join(carpeta, f"v{version}.{formato}")
+
+
+def _leer_disco(nombre, rol, uid, version, formato):
+    try:
+        _, path = _ruta_disco(nombre, rol, uid, version, formato)
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _escribir_disco(nombre, rol, uid, version, formato, contenido):
+    try:
+        carpeta, final = _ruta_disco(nombre, rol, uid, version, formato)
+        os.makedirs(carpeta, exist_ok=True)
+        tmp = f"{final}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(contenido)
+        os.replace(tmp, final)
+
+        # Borrar versiones viejas del mismo gráfico y formato
+        for archivo in os.listdir(carpeta):
+            path = os.path.join(carpeta, archivo)
+            if archivo.endswith(f".{formato}") and path != final:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+    except OSError as e:
+        print(f"[stats] No se pudo escribir la caché en disco: {e}")
+
+
+def _grafico_cacheado(nombre, rol, uid, construir, version=None, formato="png", en_disco=True):
+    """
+    Imagen del gráfico desde memoria, disco o renderizándola.
+    en_disco=False la guarda solo en memoria (variantes con parámetros libres).
+    """
+    if version is None:
+        version, _ = _version_datos(rol, uid)
+    clave = (nombre, rol, uid, version, formato)
+
+    with _cache_graficos_lock:
+        imagen = _cache_graficos.get(clave)
+        if imagen is not None:
+            _cache_graficos.move_to_end(clave)
+            return imagen
+
+    imagen = _leer_disco(nombre, rol, uid, version, formato) if en_disco else None
+    if imagen is None:
+        tipo, datos = construir(rol, uid)
+        imagen = FORMATOS[formato][1].renderizar(tipo, **datos)
+        if en_disco:
+            _escribir_disco(nombre, rol, uid, version, formato, imagen)
+
+    with _cache_graficos_lock:
+        _cache_graficos[clave] = imagen
+        _cache_graficos.move_to_end(clave)
+        while len(_cache_graficos) > STATS_CACHE_MAX:
+            _cache_graficos.popitem(last=False)
+    return imagen
+
+
+def _servir_grafico(nombre, construir, en_disco=True):
+    """
+    Responde el gráfico para el usuario actual (según su rol), en PNG o
+    en SVG con ?format=svg.
+    ETag y Last-Modified salen de la versión del alcance (cambia con cada
+    inscripción o cambio de nota que el usuario ve), así que un navegador
+    con la imagen al día recibe 304 sin tocar matplotlib.
+    """
+    rol = current_user.role
+    uid = None if rol == "admin" else current_user.id
+    formato = _formato_pedido()
+    version, modificado = _version_datos(rol, uid)
+    etag = _nombre_archivo(nombre, rol, uid) + f"-v{version}-{formato}"
+
+    if not is_resource_modified(request.environ, etag=etag, last_modified=modificado):
+        resp = Response(status=304)
+    else:
+        try:
+            imagen = _grafico_cacheado(nombre, rol, uid, construir, version=version,
+                                       formato=formato, en_disco=en_disco)
+        except render.RenderNoDisponible as e:
+            print(f"[stats] {nombre}: {e}")
+            resp = Response("Gráfico no disponible, reintente en unos segundos.", status=503)
+            resp.headers["Retry-After"] = "5"
+            return resp
+        resp = Response(imagen, mimetype=FORMATOS[formato][0])
+
+    resp.set_etag(etag)
+    if modificado is not None:
+        resp.last_modified = modificado
+    # El navegador guarda la imagen pero revalida en cada visita
+    resp.cache_control.private = True
+    resp.cache_control.no_cache = True
+    return resp
 
-    db, Course, Enrollment = _get_db_models()
+
+# =========================
+# ADMIN / PROFESOR  (gráficos)
+# =========================
+
+def _datos_inscripciones(rol, uid):
+    db, Course, _ = _get_db_models()
+    StatsCurso, _, _ = _get_resumenes()
 
     q = (
         db.session.query(
             Course.nombre.label("curso"),
-            db.func.count(Enrollment.id).label("cantidad"),
+            db.func.sum(StatsCurso.inscripciones).label("cantidad"),
         )
-        .join(Course, Enrollment.course_id == Course.id)
+        .join(Course, StatsCurso.course_id == Course.id)
+        .filter(StatsCurso.inscripciones > 0)
     )
 
     # admin -> todos los cursos
     # profesor -> solo sus cursos
-    if current_user.role == "profesor":
-        q = q.filter(Course.teacher_id == current_user.id)
+    if rol == "profesor":
+        q = q.filter(Course.teacher_id == uid)
 
     q = q.group_by(Course.nombre).order_by(Course.nombre)
     rows = q.all()
     if not rows:
-        return _fig_sin_datos()
-
-    df = pd.DataFrame(rows, columns=["curso", "cantidad"])
-
- 
-    etiquetas = [textwrap.fill(nombre, width=18) for nombre in df["curso"]]
-
-    fig, ax = plt.subplots(figsize=(9, 4))
-    x = range(len(df))
-    colors = plt.cm.Set3(range(len(df)))
-
-    ax.bar(x, df["cantidad"], color=colors)
-    ax.set_xticks(x)
-    ax.set_xticklabels(etiquetas, rotation=20, ha="right")
-
-    ax.set_title("Inscripciones por curso")
-    ax.set_ylabel("Inscripciones")
-    ax.set_xlabel("Curso")
-    ax.grid(axis="y", linestyle="--", alpha=0.3)
-
-    fig.tight_layout()
-    return _fig_to_png(fig)
+        return _grafico("sin_datos")
+
+    return _grafico(
+        "barras",
+        etiquetas=[r.curso for r in rows],
+        valores=[int(r.cantidad) for r in rows],
+        titulo="Inscripciones por curso",
+        ylabel="Inscripciones",
+        xlabel="Curso",
+        paleta="Set3",
+    )
 
 
-@stats_bp.route("/admin/stats/notas.png")
+@stats_bp.route("/admin/stats/inscripciones.png")
 @login_required
-def admin_notas_png():
+def admin_inscripciones_png():
     if not _solo_admin_o_profesor():
         return "Acceso denegado", 403
+    return _servir_grafico("inscripciones", _datos_inscripciones)
 
-    db, Course, Enrollment = _get_db_models()
+
+def _datos_notas(rol, uid):
+    db, Course, _ = _get_db_models()
+    StatsCurso, _, _ = _get_resumenes()
 
     q = (
         db.session.query(
             Course.nombre.label("curso"),
-            Enrollment.nota.label("nota"),
+            (
+                db.func.sum(StatsCurso.suma_notas)
+                / db.func.sum(StatsCurso.cant_notas)
+            ).label("nota"),
         )
-        .join(Course, Enrollment.course_id == Course.id)
-        .filter(Enrollment.nota.isnot(None))
+        .join(Course, StatsCurso.course_id == Course.id)
+        .filter(StatsCurso.cant_notas > 0)
     )
 
-    if current_user.role == "profesor":
-        q = q.filter(Course.teacher_id == current_user.id)
+    if rol == "profesor":
+        q = q.filter(Course.teacher_id == uid)
 
-    q = q.order_by(Course.nombre)
+    q = q.group_by(Course.nombre).order_by(Course.nombre)
     rows = q.all()
     if not rows:
-        return _fig_sin_datos()
-
-    df = pd.DataFrame(rows, columns=["curso", "nota"])
-    df_group = df.groupby("curso")["nota"].mean().reset_index()
-
-    etiquetas = [textwrap.fill(nombre, width=18) for nombre in df_group["curso"]]
-
-    fig, ax = plt.subplots(figsize=(9, 4))
-    x = range(len(df_group))
-    colors = plt.cm.Set2(range(len(df_group)))
-
-    ax.bar(x, df_group["nota"], color=colors)
-    ax.set_xticks(x)
-    ax.set_xticklabels(etiquetas, rotation=20, ha="right")
-
-    ax.set_title("Notas promedio por curso")
-    ax.set_ylabel("Nota promedio")
-    ax.set_xlabel("Curso")
-    ax.set_ylim(0, 10)
-    ax.grid(axis="y", linestyle="--", alpha=0.3)
-
-    fig.tight_layout()
-    return _fig_to_png(fig)
+        return _grafico("sin_datos")
+
+    return _grafico(
+        "barras",
+        etiquetas=[r.curso for r in rows],
+        valores=[float(r.nota) for r in rows],
+        titulo="Notas promedio por curso",
+        ylabel="Nota promedio",
+        xlabel="Curso",
+        paleta="Set2",
+        ylim=(0, 10),
+    )
 
 
-@stats_bp.route("/admin/stats/actividad.png")
+@stats_bp.route("/admin/stats/notas.png")
 @login_required
-def admin_actividad_png():
+def admin_notas_png():
     if not _solo_admin_o_profesor():
         return "Acceso denegado", 403
+    return _servir_grafico("notas", _datos_notas)
+
+
+# Agrupaciones del gráfico de actividad, de la más fina a la más gruesa,
+# con los días mínimos que cubre cada punto (para acotar la cantidad).
+AGRUPACIONES = [("day", 1), ("week", 7), ("month", 28), ("year", 365)]
+
+_NOMBRE_AGRUPACION = {"day": "día", "week": "semana", "month": "mes", "year": "año"}
+
+
+def _parametros_actividad():
+    """
+    (desde, hasta, agrupación) de ?from=AAAA-MM-DD&to=AAAA-MM-DD&bucket=.
+    bucket: day, week, month, year o auto (por defecto). Lanza ValueError
+    si algún parámetro es inválido.
+    """
+    def _fecha(nombre):
+        valor = request.args.get(nombre)
+        return date.fromisoformat(valor) if valor else None
+
+    desde, hasta = _fecha("from"), _fecha("to")
+    agrupar = (request.args.get("bucket") or "auto").lower()
+    if agrupar != "auto" and agrupar not in dict(AGRUPACIONES):
+        raise ValueError(f"bucket inválido: {agrupar}")
+    if desde and hasta and desde > hasta:
+        raise ValueError("from es posterior a to")
+    return desde, hasta, agrupar
+
+
+def _elegir_agrupacion(desde, hasta, minima="auto"):
+    """La agrupación más fina (no menor a `minima`) que no supera el máximo de puntos."""
+    dias = (hasta - desde).days + 1
+    nombres = [n for n, _ in AGRUPACIONES]
+    candidatas = AGRUPACIONES if minima == "auto" else AGRUPACIONES[nombres.index(minima):]
+    for nombre, dias_por_punto in candidatas:
+        if dias / dias_por_punto <= STATS_ACTIVIDAD_MAX_PUNTOS:
+            return nombre
+    return "year"
+
+
+def _expr_agrupacion(db, columna, agrupar):
+    """Primer día del tramo de `columna` (una fecha), calculado en la BD."""
+    if agrupar == "day":
+        return columna
+    if db.session.get_bind().dialect.name == "sqlite":
+        return {
+            # 'weekday 0' lleva al domingo siguiente (o el mismo); -6 días = lunes
+            "week": db.func.date(columna, "weekday 0", "-6 days"),
+            "month": db.func.strftime("%Y-%m-01", columna),
+            "year": db.func.strftime("%Y-01-01", columna),
+        }[agrupar]
+    return db.cast(db.func.date_trunc(agrupar, columna), db.Date)
+
+
+def _a_fecha(valor):
+    # SQLite devuelve los tramos como texto 'AAAA-MM-DD'
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return date.fromisoformat(str(valor)[:10])
+
+
+def _datos_actividad(rol, uid, desde=None, hasta=None, agrupar="auto"):
+    db, Course, _ = _get_db_models()
+    _, StatsCursoDia, _ = _get_resumenes()
+
+    def _alcance(q):
+        q = q.filter(StatsCursoDia.cantidad > 0)
+        if desde is not None:
+            q = q.filter(StatsCursoDia.fecha >= desde)
+        if hasta is not None:
+            q = q.filter(StatsCursoDia.fecha <= hasta)
+        if rol == "profesor":
+            q = q.join(Course, StatsCursoDia.course_id == Course.id)
+            q = q.filter(Course.teacher_id == uid)
+        return q
+
+    # Rango efectivo (para elegir la agrupación) si no vino completo
+    inicio, fin = desde, hasta
+    if inicio is None or fin is None:
+        minimo, maximo = _alcance(
+            db.session.query(db.func.min(StatsCursoDia.fecha), db.func.max(StatsCursoDia.fecha))
+        ).one()
+        if minimo is None:
+            return _grafico("sin_datos")
+        inicio, fin = inicio or _a_fecha(minimo), fin or _a_fecha(maximo)
+
+    agrupar = _elegir_agrupacion(inicio, fin, agrupar)
+    tramo = _expr_agrupacion(db, StatsCursoDia.fecha, agrupar).label("tramo")
+
+    rows = (
+        _alcance(db.session.query(tramo, db.func.sum(StatsCursoDia.cantidad).label("cantidad")))
+        .group_by(tramo)
+        .order_by(tramo)
+        .all()
+    )
+    if not rows:
+        return _grafico("sin_datos")
+
+    return _grafico(
+        "lineas",
+        x=[_a_fecha(r.tramo) for r in rows],
+        y=[int(r.cantidad) for r in rows],
+        titulo=f"Actividad de inscripciones por {_NOMBRE_AGRUPACION[agrupar]}",
+        ylabel="Inscripciones",
+        xlabel="Fecha",
+    )
 
+
+def _datos_notas_distribucion(rol, uid):
     db, Course, Enrollment = _get_db_models()
 
-    q = db.session.query(
-        db.func.date(Enrollment.created_at).label("fecha"),
-        db.func.count(Enrollment.id).label("cantidad"),
+    # Histograma en la BD: floor antes del CAST, porque CAST a entero trunca
+    # en SQLite pero redondea en PostgreSQL (7.6 caería en el tramo 8);
+    # el 10 cae en el tramo 9-10.
+    tramo = db.case(
+        (Enrollment.nota >= 10, 9),
+        else_=db.cast(db.func.floor(Enrollment.nota), db.Integer),
+    )
+    q = (
+        db.session.query(tramo.label("tramo"), db.func.count(Enrollment.id))
+        .filter(Enrollment.nota.isnot(None))
     )
 
-    if current_user.role == "profesor":
+    if rol == "profesor":
         q = q.join(Course, Enrollment.course_id == Course.id)
-        q = q.filter(Course.teacher_id == current_user.id)
-
-    q = q.group_by(db.func.date(Enrollment.created_at)).order_by(
-        db.func.date(Enrollment.created_at)
-    )
+        q = q.filter(Course.teacher_id == uid)
 
-    rows = q.all()
+    rows = q.group_by(tramo).all()
     if not rows:
-        return _fig_sin_datos()
+        return _grafico("sin_datos")
+
+    cantidades = [0] * 10
+    for t, n in rows:
+        if t is not None and 0 <= t <= 9:
+            cantidades[int(t)] += n
+
+    return _grafico(
+        "barras",
+        etiquetas=[f"{i}-{i + 1}" for i in range(10)],
+        valores=cantidades,
+        titulo="Distribución de notas",
+        ylabel="Inscripciones",
+        xlabel="Nota",
+        paleta="Set2",
+        envolver=False,
+        rotacion=0,
+    )
 
-    df = pd.DataFrame(rows, columns=["fecha", "cantidad"])
 
-    fig, ax = plt.subplots(figsize=(9, 4))
-    ax.plot(df["fecha"], df["cantidad"], marker="o")
+@stats_bp.route("/admin/stats/notas_distribucion.png")
+@login_required
+def admin_notas_distribucion_png():
+    if not _solo_admin_o_profesor():
+        return "Acceso denegado", 403
+    return _servir_grafico("notas_distribucion", _datos_notas_distribucion)
 
-    ax.set_title("Actividad de inscripciones por fecha")
-    ax.set_ylabel("Inscripciones")
-    ax.set_xlabel("Fecha")
-    ax.grid(True, linestyle="--", alpha=0.3)
-    fig.autofmt_xdate()
 
-    fig.tight_layout()
-    return _fig_to_png(fig)
+@stats_bp.route("/admin/stats/actividad.png")
+@login_required
+def admin_actividad_png():
+    if not _solo_admin_o_profesor():
+        return "Acceso denegado", 403
+    try:
+        desde, hasta, agrupar = _parametros_actividad()
+    except ValueError as e:
+        return f"Parámetros inválidos: {e}", 400
+
+    if desde is None and hasta is None and agrupar == "auto":
+        return _servir_grafico("actividad", _datos_actividad)
+
+    # Rangos a pedido: solo caché en memoria, para no llenar el disco
+    nombre = f"actividad_{desde or 'inicio'}_{hasta or 'fin'}_{agrupar}"
+    return _servir_grafico(
+        nombre,
+        lambda rol, uid: _datos_actividad(rol, uid, desde, hasta, agrupar),
+        en_disco=False,
+    )
 
 
 # =========================
 # Páginas HTML admin / profesor
 # =========================
 
+def _filtro_actividad():
+    """Parámetros de actividad del request, para repetirlos en la API y las imágenes."""
+    return {k: v for k in ("from", "to", "bucket") if (v := request.args.get(k))}
+
+
 @stats_bp.route("/admin/stats")
 @login_required
 def admin_stats_page():
     if current_user.role != "admin":
         return "Acceso denegado", 403
-    return render_template("admin_stats.html", active="stats")
+    return render_template("admin_stats.html", active="stats",
+                           filtro_actividad=_filtro_actividad())
 
 
 @stats_bp.route("/profesor/stats")
@@ -204,57 +524,88 @@ def profesor_stats_page():
     if current_user.role != "profesor":
         return "Acceso denegado", 403
 
-    return render_template("admin_stats.html", active="stats")
+    return render_template("admin_stats.html", active="stats",
+                           filtro_actividad=_filtro_actividad())
 
 
 # =========================
 # ESTUDIANTE
 # =========================
 
-@stats_bp.route("/estudiante/stats/notas.png")
-@login_required
-def estudiante_notas_png():
-    if current_user.role != "estudiante":
-        return "Acceso denegado", 403
-
+def _datos_estudiante_notas(rol, uid):
     db, Course, Enrollment = _get_db_models()
 
+    # El promedio se calcula en la BD: solo viajan ~1 fila por curso
     q = (
         db.session.query(
             Course.nombre.label("curso"),
-            Enrollment.nota.label("nota"),
+            db.func.avg(Enrollment.nota).label("nota"),
         )
         .join(Course, Enrollment.course_id == Course.id)
         .filter(
-            Enrollment.user_id == current_user.id,
+            Enrollment.user_id == uid,
             Enrollment.nota.isnot(None),
         )
+        .group_by(Course.nombre)
+        .order_by(Course.nombre)
     )
 
     rows = q.all()
     if not rows:
-        return _fig_sin_datos()
+        return _grafico("sin_datos")
+
+    return _grafico(
+        "barras",
+        etiquetas=[r.curso for r in rows],
+        valores=[float(r.nota) for r in rows],
+        titulo="Notas por curso",
+        ylabel="Nota promedio",
+        xlabel="Curso",
+        figsize=(6, 4),
+        paleta="Set2",
+    )
 
-    df = pd.DataFrame(rows, columns=["curso", "nota"])
-    df_group = df.groupby("curso")["nota"].mean().reset_index()
 
-    etiquetas = [textwrap.fill(nombre, width=18) for nombre in df_group["curso"]]
+@stats_bp.route("/estudiante/stats/notas.png")
+@login_required
+def estudiante_notas_png():
+    if current_user.role != "estudiante":
+        return "Acceso denegado", 403
+    return _servir_grafico("estudiante_notas", _datos_estudiante_notas)
 
-    fig, ax = plt.subplots(figsize=(6, 4))
-    x = range(len(df_group))
-    colors = plt.cm.Set2(range(len(df_group)))
 
-    ax.bar(x, df_group["nota"], color=colors)
-    ax.set_xticks(x)
-    ax.set_xticklabels(etiquetas, rotation=20, ha="right")
+def _datos_estado_entregas(rol, uid):
+    db, _, _ = _get_db_models()
+    _, _, StatsEstudianteEstado = _get_resumenes()
 
-    ax.set_title("Notas por curso")
-    ax.set_ylabel("Nota promedio")
-    ax.set_xlabel("Curso")
-    ax.grid(axis="y", linestyle="--", alpha=0.3)
+    q = (
+        db.session.query(
+            StatsEstudianteEstado.status.label("estado"),
+            StatsEstudianteEstado.cantidad.label("cantidad"),
+        )
+        .filter(
+            StatsEstudianteEstado.user_id == uid,
+            StatsEstudianteEstado.cantidad > 0,
+        )
+        .order_by(StatsEstudianteEstado.status)
+    )
 
-    fig.tight_layout()
-    return _fig_to_png(fig)
+    rows = q.all()
+    if not rows:
+        return _grafico("sin_datos")
+
+    return _grafico(
+        "barras",
+        etiquetas=[r.estado for r in rows],
+        valores=[int(r.cantidad) for r in rows],
+        titulo="Estado de entregas",
+        ylabel="Cantidad",
+        xlabel="Estado",
+        figsize=(5, 4),
+        paleta="Pastel2",
+        envolver=False,
+        rotacion=0,
+    )
 
 
 @stats_bp.route("/estudiante/stats/estado_entregas.png")
@@ -262,40 +613,97 @@ def estudiante_notas_png():
 def estudiante_estado_entregas_png():
     if current_user.role != "estudiante":
         return "Acceso denegado", 403
+    return _servir_grafico("estado_entregas", _datos_estado_entregas)
 
-    db, Course, Enrollment = _get_db_models()
 
-    q = (
-        db.session.query(
-            Enrollment.status.label("estado"),
-            db.func.count(Enrollment.id).label("cantidad"),
-        )
-        .filter(Enrollment.user_id == current_user.id)
-        .group_by(Enrollment.status)
-    )
+@stats_bp.route("/estudiante/stats")
+@login_required
+def estudiante_stats_page():
+    if current_user.role != "estudiante":
+        return "Acceso denegado", 403
+    return render_template("estudiante_stats.html", active="mi_stats")
 
-    rows = q.all()
-    if not rows:
-        return _fig_sin_datos()
 
-    df = pd.DataFrame(rows, columns=["estado", "cantidad"])
+# =========================
+# Registro de gráficos
+# =========================
+#
+# Nombre (el mismo de la caché) -> función de datos (rol, uid) de cada
+# página. Lo usan la API JSON y `flask stats warm` (stats/precalentar.py).
 
-    fig, ax = plt.subplots(figsize=(5, 4))
-    colors = plt.cm.Pastel2(range(len(df)))
-    ax.bar(df["estado"], df["cantidad"], color=colors)
+GRAFICOS_ADMIN = {
+    "inscripciones": _datos_inscripciones,
+    "notas": _datos_notas,
+    "notas_distribucion": _datos_notas_distribucion,
+    "actividad": _datos_actividad,
+}
 
-    ax.set_title("Estado de entregas")
-    ax.set_ylabel("Cantidad")
-    ax.set_xlabel("Estado")
-    ax.grid(axis="y", linestyle="--", alpha=0.3)
+GRAFICOS_ESTUDIANTE = {
+    "estudiante_notas": _datos_estudiante_notas,
+    "estado_entregas": _datos_estado_entregas,
+}
 
-    fig.tight_layout()
-    return _fig_to_png(fig)
 
+# =========================
+# API JSON (gráficos en el navegador)
+# =========================
+#
+# Las páginas de estadísticas piden todas sus series en un solo request y
+# dibujan en el cliente; el servidor solo hace las consultas agregadas.
+
+
+def _serie_json(tipo, datos):
+    serie = {"tipo": tipo, **datos}
+    if tipo == "lineas":
+        serie["x"] = [x.isoformat() if hasattr(x, "isoformat") else x for x in datos["x"]]
+    if tipo == "barras":
+        serie["colores"] = svg.PALETAS.get(datos.get("paleta"), svg.PALETAS["Set3"])
+    return serie
+
+
+def _servir_series(graficos):
+    """Todas las series de `graficos` en un JSON, con ETag por versión de datos."""
+    rol = current_user.role
+    uid = None if rol == "admin" else current_user.id
+    version, modificado = _version_datos(rol, uid)
+    etag = f"series-{rol}-{uid if uid is not None else 'all'}-v{version}"
+    if request.query_string:
+        etag += "-" + hashlib.sha1(request.query_string).hexdigest()[:12]
+
+    if not is_resource_modified(request.environ, etag=etag, last_modified=modificado):
+        resp = Response(status=304)
+    else:
+        series = {nombre: _serie_json(*construir(rol, uid)) for nombre, construir in graficos.items()}
+        resp = jsonify({"version": version, "graficos": series})
+
+    resp.set_etag(etag)
+    if modificado is not None:
+        resp.last_modified = modificado
+    resp.cache_control.private = True
+    resp.cache_control.no_cache = True
+    return resp
+
+
+@stats_bp.route("/api/stats/admin")
+@login_required
+def api_stats_admin():
+    if not _solo_admin_o_profesor():
+        return jsonify({"error": "Acceso denegado"}), 403
+    try:
+        desde, hasta, agrupar = _parametros_actividad()
+    except ValueError as e:
+        return jsonify({"error": f"Parámetros inválidos: {e}"}), 400
+
+    graficos = dict(
+        GRAFICOS_ADMIN,
+        actividad=lambda rol, uid: _datos_actividad(rol, uid, desde, hasta, agrupar),
+    )
+    return _servir_series(graficos)
 
-@stats_bp.route("/estudiante/stats")
+
+@stats_bp.route("/api/stats/estudiante")
 @login_required
-def estudiante_stats_page():
+def api_stats_estudiante():
     if current_user.role != "estudiante":
-        return "Acceso denegado", 403
-    return render_template("estudiante_stats.html", active="mi_stats")
\ No newline at end of file
+        return jsonify({"error": "Acceso denegado"}), 403
+    return _servir_series(GRAFICOS_ESTUDIANTE)
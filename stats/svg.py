@@ -0,0 +1,207 @@
+# stats/svg.py
+"""
+Render SVG sin matplotlib para los gráficos simples (barras y líneas).
+
+Mismas funciones y argumentos que stats/render.py, mismo aspecto general
+(etiquetas envueltas a 18 caracteres, paletas Set2/Set3/Pastel2, grilla
+punteada), pero es solo armado de strings: tarda microsegundos y no
+carga matplotlib ni pandas en el worker.
+"""
+
+import math
+import textwrap
+from datetime import date
+from xml.sax.saxutils import escape
+
+
+PALETAS = {
+    "Set2": ["#66c2a5", "#fc8d62", "#8da0cb", "#e78ac3",
+             "#a6d854", "#ffd92f", "#e5c494", "#b3b3b3"],
+    "Set3": ["#8dd3c7", "#ffffb3", "#bebada", "#fb8072", "#80b1d3", "#fdb462",
+             "#b3de69", "#fccde5", "#d9d9d9", "#bc80bd", "#ccebc5", "#ffed6f"],
+    "Pastel2": ["#b3e2cd", "#fdcdac", "#cbd5e8", "#f4cae4",
+                "#e6f5c9", "#fff2ae", "#f1e2cc", "#cccccc"],
+}
+
+LINEA = "#1f77b4"
+FUENTE = "font-family:DejaVu Sans,Arial,sans-serif"
+ALTO_LINEA = 13
+
+
+def _escala(maximo, ylim=None):
+    """(tope, paso) 'lindos' para el eje Y, con ~5 divisiones."""
+    if ylim is not None:
+        tope = ylim[1]
+        paso = _paso(tope)
+        return tope, paso
+    maximo = maximo if maximo > 0 else 1
+    paso = _paso(maximo)
+    return paso * math.ceil(maximo / paso), paso
+
+
+def _paso(maximo):
+    bruto = maximo / 5
+    mag = 10 ** math.floor(math.log10(bruto))
+    for m in (1, 2, 2.5, 5, 10):
+        if bruto <= m * mag:
+            return m * mag
+    return 10 * mag
+
+
+def _num(v):
+    return f"{v:g}"
+
+
+def _texto(x, y, contenido, tam=11, anchor="middle", extra=""):
+    lineas = str(contenido).split("\n")
+    if len(lineas) == 1:
+        return (f'<text x="{x:.1f}" y="{y:.1f}" font-size="{tam}" '
+                f'text-anchor="{anchor}"{extra}>{escape(lineas[0])}</text>')
+    tspans = "".join(
+        f'<tspan x="{x:.1f}" dy="{0 if i == 0 else ALTO_LINEA}">{escape(l)}</tspan>'
+        for i, l in enumerate(lineas)
+    )
+    return f'<text y="{y:.1f}" font-size="{tam}" text-anchor="{anchor}"{extra}>{tspans}</text>'
+
+
+def _documento(ancho, alto, partes):
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{ancho}" height="{alto}" '
+        f'viewBox="0 0 {ancho} {alto}" style="{FUENTE}">'
+        f'<rect width="100%" height="100%" fill="#fff"/>'
+        + "".join(partes)
+        + "</svg>"
+    ).encode("utf-8")
+
+
+def _ejes(partes, izq, arriba, ancho_plot, alto_plot, tope, paso, titulo, ylabel, xlabel,
+          alto, grilla_x=None):
+    """Título, grilla horizontal, eje Y con marcas y rótulos de ejes."""
+    partes.append(_texto(izq + ancho_plot / 2, 22, titulo, tam=14))
+
+    v = 0.0
+    while v <= tope + 1e-9:
+        y = arriba + alto_plot - v / tope * alto_plot
+        partes.append(
+            f'<line x1="{izq}" y1="{y:.1f}" x2="{izq + ancho_plot}" y2="{y:.1f}" '
+            f'stroke="#000" stroke-opacity="0.3" stroke-dasharray="4 3"/>'
+        )
+        partes.append(_texto(izq - 6, y + 4, _num(round(v, 6)), tam=10, anchor="end"))
+        v += paso
+
+    for x in grilla_x or []:
+        partes.append(
+            f'<line x1="{x:.1f}" y1="{arriba}" x2="{x:.1f}" y2="{arriba + alto_plot}" '
+            f'stroke="#000" stroke-opacity="0.3" stroke-dasharray="4 3"/>'
+        )
+
+    partes.append(
+        f'<rect x="{izq}" y="{arriba}" width="{ancho_plot}" height="{alto_plot}" '
+        f'fill="none" stroke="#000" stroke-width="0.8"/>'
+    )
+    partes.append(_texto(izq + ancho_plot / 2, alto - 8, xlabel, tam=11))
+    partes.append(_texto(
+        16, arriba + alto_plot / 2, ylabel, tam=11,
+        extra=f' transform="rotate(-90 16 {arriba + alto_plot / 2:.1f})"',
+    ))
+
+
+def sin_datos(msg="Sin datos"):
+    return _documento(640, 480, [_texto(320, 244, msg, tam=12)])
+
+
+def barras(etiquetas, valores, titulo, ylabel, xlabel,
+           figsize=(9, 4), paleta="Set3", ylim=None, envolver=True, rotacion=20):
+    # La rotación de matplotlib no aplica: las etiquetas envueltas van
+    # horizontales en varias líneas.
+    if envolver:
+        etiquetas = [textwrap.fill(str(e), width=18) for e in etiquetas]
+    etiquetas = [str(e) for e in etiquetas]
+
+    ancho, alto = int(figsize[0] * 100), int(figsize[1] * 100)
+    max_lineas = max((e.count("\n") + 1 for e in etiquetas), default=1)
+    izq, der, arriba = 60, 20, 40
+    abajo = 36 + max_lineas * ALTO_LINEA
+    alto = max(alto, arriba + abajo + 160)
+    ancho_plot, alto_plot = ancho - izq - der, alto - arriba - abajo
+
+    tope, paso = _escala(max(valores, default=0), ylim)
+    colores = PALETAS.get(paleta, PALETAS["Set3"])
+
+    partes = []
+    _ejes(partes, izq, arriba, ancho_plot, alto_plot, tope, paso, titulo, ylabel, xlabel, alto)
+
+    n = max(len(valores), 1)
+    slot = ancho_plot / n
+    barra = slot * 0.8
+    for i, (etiqueta, valor) in enumerate(zip(etiquetas, valores)):
+        h = max(min(valor, tope), 0) / tope * alto_plot
+        x = izq + i * slot + (slot - barra) / 2
+        partes.append(
+            f'<rect x="{x:.1f}" y="{arriba + alto_plot - h:.1f}" width="{barra:.1f}" '
+            f'height="{h:.1f}" fill="{colores[i % len(colores)]}">'
+            f'<title>{escape(etiqueta.replace(chr(10), " "))}: {_num(valor)}</title></rect>'
+        )
+        partes.append(_texto(izq + (i + 0.5) * slot, arriba + alto_plot + 14, etiqueta, tam=10))
+
+    return _documento(ancho, alto, partes)
+
+
+def lineas(x, y, titulo, ylabel, xlabel, figsize=(9, 4)):
+    ancho, alto = int(figsize[0] * 100), int(figsize[1] * 100)
+    izq, der, arriba, abajo = 60, 30, 40, 50
+    ancho_plot, alto_plot = ancho - izq - der, alto - arriba - abajo
+
+    # Fechas en escala de tiempo (como matplotlib); otros valores, equiespaciados
+    if x and all(isinstance(v, date) for v in x):
+        pos = [v.toordinal() for v in x]
+        rotulos = [v.isoformat() for v in x]
+    else:
+        pos = list(range(len(x)))
+        rotulos = [str(v) for v in x]
+
+    lo, hi = (min(pos), max(pos)) if pos else (0, 1)
+    rango = (hi - lo) or 1
+    tope, paso = _escala(max(y, default=0))
+
+    def px(p):
+        return izq + 10 + (p - lo) / rango * (ancho_plot - 20)
+
+    def py(v):
+        return arriba + alto_plot - v / tope * alto_plot
+
+    # Como mucho ~8 rótulos en el eje X
+    cada = max(1, math.ceil(len(pos) / 8))
+    marcas = list(range(0, len(pos), cada))
+
+    partes = []
+    _ejes(partes, izq, arriba, ancho_plot, alto_plot, tope, paso, titulo, ylabel, xlabel,
+          alto, grilla_x=[px(pos[i]) for i in marcas])
+
+    puntos = " ".join(f"{px(p):.1f},{py(v):.1f}" for p, v in zip(pos, y))
+    if puntos:
+        partes.append(f'<polyline points="{puntos}" fill="none" stroke="{LINEA}" stroke-width="1.5"/>')
+    for p, v, r in zip(pos, y, rotulos):
+        partes.append(
+            f'<circle cx="{px(p):.1f}" cy="{py(v):.1f}" r="3.5" fill="{LINEA}">'
+            f'<title>{escape(r)}: {_num(v)}</title></circle>'
+        )
+    for i in marcas:
+        partes.append(_texto(
+            px(pos[i]), arriba + alto_plot + 16, rotulos[i], tam=10, anchor="end",
+            extra=f' transform="rotate(-30 {px(pos[i]):.1f} {arriba + alto_plot + 16:.1f})"',
+        ))
+
+    return _documento(ancho, alto, partes)
+
+
+GRAFICOS = {
+    "sin_datos": sin_datos,
+    "barras": barras,
+    "lineas": lineas,
+}
+
+
+def renderizar(tipo, **kwargs):
+    """SVG (bytes) del gráfico `tipo`; misma firma que render.renderizar."""
+    return GRAFICOS[tipo](**kwargs)
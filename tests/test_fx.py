@@ -0,0 +1,86 @@
+# tests/test_fx.py
+"""
+Descarga de tasas contra un proveedor local (http.server) que responde
+mal las primeras veces. Correr desde la raíz: python -m pytest -q
+"""
+
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from services import fx
+
+
+class _Proveedor(BaseHTTPRequestHandler):
+    """Imita open.er-api.com: /latest/USD. `fallos` respuestas 503 y después 200."""
+
+    fallos = 0
+    pedidos = 0
+
+    def do_GET(self):
+        cls = type(self)
+        cls.pedidos += 1
+        if cls.pedidos <= cls.fallos:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        cuerpo = json.dumps({"result": "success", "rates": {"USD": 1, "EUR": 0.9}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+class DescargaCubiertaTest(unittest.TestCase):
+
+    def setUp(self):
+        # Clase propia por test: los contadores no se comparten
+        self.handler = type("Proveedor", (_Proveedor,), {"fallos": 0, "pedidos": 0})
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), self.handler)
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.servidor.server_port}"
+
+        parchear = [
+            mock.patch.object(fx, "FX_HEDGE", True),
+            mock.patch.object(fx, "FX_BACKOFF", 0.01),
+            mock.patch.object(fx, "proveedores", lambda: [self.base]),
+            mock.patch.object(fx, "_parser_para", lambda base: fx._tabla_open_er_api),
+        ]
+        for p in parchear:
+            p.start()
+            self.addCleanup(p.stop)
+        self.addCleanup(self.servidor.server_close)
+        self.addCleanup(self.servidor.shutdown)
+
+    def test_reintenta_503_dentro_del_limite(self):
+        self.handler.fallos = 1
+
+        tabla, proveedor = fx.descargar_tabla("EUR")
+
+        self.assertEqual(proveedor, self.base)
+        self.assertEqual(tabla["EUR"], 0.9)
+        self.assertEqual(self.handler.pedidos, 2)
+
+    def test_no_pasa_del_limite(self):
+        self.handler.fallos = 1000
+
+        with mock.patch.object(fx, "FX_DEADLINE", 0.5), \
+                mock.patch.object(fx, "FX_RETRIES", 50):
+            inicio = time.monotonic()
+            tabla, _ = fx.descargar_tabla("EUR")
+            duracion = time.monotonic() - inicio
+
+        self.assertIsNone(tabla)
+        self.assertLess(duracion, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()